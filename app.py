@@ -1,24 +1,51 @@
 import os
 import json
-import requests
-from flask import Flask, render_template, request, jsonify, send_file
+import click
+from flask import Flask, render_template, request, jsonify, send_file, Response
 from werkzeug.utils import secure_filename
-import PyPDF2
 import io
 from datetime import datetime
 import re
+import hashlib
+import uuid
+import threading
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from extraction import extract_pdf_text
+from cache import TieredCache, SQLiteCache, SingleFlight
+from ats_scoring import ATSScorer, load_rules
+from sections import SectionSegmenter
+from resume_templates import TemplateRegistry
+from artifacts import ArtifactStore, artifact_key
+from archive import iter_zip
+from storage import StorageManager, StorageSweeper
+from config import Config
+from search_index import SkillIndex, QueryError
+from job_matching import JobMatcher
+from skill_taxonomy import SkillTaxonomy, DEFAULT_TAXONOMY_PATH
+from inference import InferenceClient, generated_text, DEFAULT_API_BASE
+from resilience import TokenBucket, CircuitBreaker
+from job_queue import JobQueue
+
+# Corpus ranking memory-maps resume vectors with NumPy
+try:
+    from ranking import CorpusStore
+    RANKING_AVAILABLE = True
+except ImportError:
+    RANKING_AVAILABLE = False
+    print("Warning: NumPy not available. Corpus ranking will be disabled.")
 
 # Try to import reportlab for PDF generation
 try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.lib import colors
+    from pdf_render import PDFRenderPool, RenderQueueFull
     REPORTLAB_AVAILABLE = True
 except ImportError:
     REPORTLAB_AVAILABLE = False
     print("Warning: ReportLab not available. PDF generation will be limited.")
+    
+    class RenderQueueFull(Exception):
+        """Never raised without ReportLab; keeps the handlers that catch it valid"""
 
 app = Flask(__name__)
 
@@ -26,15 +53,180 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 app.config['UPLOAD_FOLDER'] = '/tmp/uploads' if os.getenv('VERCEL') else 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Uploads are parsed in memory; set ARCHIVE_UPLOADS=true to also keep a copy on disk
+app.config['ARCHIVE_UPLOADS'] = os.getenv('ARCHIVE_UPLOADS', 'false').lower() in ('1', 'true', 'yes')
+
+# PDF extraction: process pool size (0 = extract in the request thread) and time budgets in seconds
+app.config['PDF_WORKERS'] = int(os.getenv('PDF_WORKERS', min(4, os.cpu_count() or 1)))
+app.config['PDF_PARALLEL_MIN_PAGES'] = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 4))
+app.config['PDF_PAGE_TIMEOUT'] = float(os.getenv('PDF_PAGE_TIMEOUT', 5))
+app.config['PDF_DOC_TIMEOUT'] = float(os.getenv('PDF_DOC_TIMEOUT', 15))
+
+# Analysis only reads the start of a resume; stop decoding pages once this many characters
+# (or pages) are available and decode the rest only when the full text is requested. 0 = no limit
+app.config['EXTRACTION_CHAR_BUDGET'] = int(os.getenv('EXTRACTION_CHAR_BUDGET', 8000))
+app.config['EXTRACTION_PAGE_BUDGET'] = int(os.getenv('EXTRACTION_PAGE_BUDGET', 0))
+
+# Upload result cache keyed by the SHA-256 of the PDF bytes; the disk tier is off unless a directory is set
+app.config['RESULT_CACHE_SIZE'] = int(os.getenv('RESULT_CACHE_SIZE', 256))
+app.config['RESULT_CACHE_DIR'] = os.getenv('RESULT_CACHE_DIR', '')
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.getenv('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# ATS scoring rules: JSON file overriding the defaults in ats_scoring.DEFAULT_RULES
+app.config['ATS_RULES_FILE'] = os.getenv('ATS_RULES_FILE', '')
+ats_scorer = ATSScorer(load_rules(app.config['ATS_RULES_FILE']))
+
+# Resume sections with offsets, found once per document and shared by ATS scoring and the analysis prompts
+section_segmenter = SectionSegmenter()
+
+# Inverted skill/keyword index over analyzed resumes, persisted as an append-only log
+app.config['SEARCH_INDEX_PATH'] = os.getenv(
+    'SEARCH_INDEX_PATH',
+    '/tmp/search_index.jsonl' if os.getenv('VERCEL') else os.path.join('data', 'search_index.jsonl')
+)
+skill_index = SkillIndex(app.config['SEARCH_INDEX_PATH'] or None)
+
+# Job matching: TF-IDF over the offline vocabulary in data/vocabulary.json
+job_matcher = JobMatcher()
+
+# Skill taxonomy compiled into a token trie once per process for local skill extraction
+app.config['SKILL_TAXONOMY_FILE'] = os.getenv('SKILL_TAXONOMY_FILE', '')
+try:
+    skill_taxonomy = SkillTaxonomy(app.config['SKILL_TAXONOMY_FILE'] or DEFAULT_TAXONOMY_PATH)
+except (OSError, ValueError, KeyError) as e:
+    print(f"Error loading skill taxonomy: {e}")
+    skill_taxonomy = None
+
+# Ranking corpus: TF-IDF vectors of every analyzed resume, memory-mapped for /rank
+app.config['RANKING_CORPUS_DIR'] = os.getenv(
+    'RANKING_CORPUS_DIR',
+    '/tmp/corpus' if os.getenv('VERCEL') else os.path.join('data', 'corpus')
+)
+app.config['RANKING_MAX_K'] = int(os.getenv('RANKING_MAX_K', 100))
+corpus_store = CorpusStore(app.config['RANKING_CORPUS_DIR']) if RANKING_AVAILABLE and app.config['RANKING_CORPUS_DIR'] else None
+# Resumes analyzed on budgeted text are decoded in full in the background before they are vectorized
+corpus_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='corpus')
 
-# Create uploads directory if it doesn't exist (only in local development)
-if not os.getenv('VERCEL'):
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    os.makedirs('generated_resumes', exist_ok=True)
+# Batch uploads: resumes processed concurrently per request
+app.config['BATCH_WORKERS'] = int(os.getenv('BATCH_WORKERS', 4))
+
+# Job mode: /upload stores the file, queues it in SQLite and returns a job ID to poll at /jobs/<id>
+app.config['UPLOAD_JOB_MODE'] = os.getenv('UPLOAD_JOB_MODE', 'false').lower() in ('1', 'true', 'yes')
+app.config['JOB_QUEUE_DB'] = os.getenv(
+    'JOB_QUEUE_DB',
+    '/tmp/jobs.db' if os.getenv('VERCEL') else os.path.join('data', 'jobs.db')
+)
+app.config['JOB_STORAGE_DIR'] = os.getenv('JOB_STORAGE_DIR', os.path.join(app.config['UPLOAD_FOLDER'], 'jobs'))
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+job_queue = JobQueue(app.config['JOB_QUEUE_DB'], workers=app.config['JOB_WORKERS'])
+
+result_cache = TieredCache(
+    maxsize=app.config['RESULT_CACHE_SIZE'],
+    directory=app.config['RESULT_CACHE_DIR'] or None,
+    max_bytes=app.config['RESULT_CACHE_MAX_BYTES']
+)
+
+# Archived uploads are kept within a byte quota and file count, least recently used deleted first,
+# and deleted once not accessed for UPLOAD_TTL seconds (0 = no limit)
+app.config['UPLOAD_MAX_BYTES'] = int(os.getenv('UPLOAD_MAX_BYTES', 128 * 1024 * 1024))
+app.config['UPLOAD_MAX_FILES'] = int(os.getenv('UPLOAD_MAX_FILES', 1000))
+app.config['UPLOAD_TTL'] = float(os.getenv('UPLOAD_TTL', 24 * 60 * 60))
+upload_storage = StorageManager(
+    app.config['UPLOAD_FOLDER'],
+    max_bytes=app.config['UPLOAD_MAX_BYTES'],
+    max_entries=app.config['UPLOAD_MAX_FILES'],
+    ttl=app.config['UPLOAD_TTL']
+)
+
+# Generated resumes are named by a hash of template and resume data; the least recently requested are
+# deleted beyond ARTIFACT_INDEX_SIZE resumes or GENERATED_MAX_BYTES, and after GENERATED_TTL seconds unused
+app.config['GENERATED_FOLDER'] = '/tmp/generated_resumes' if os.getenv('VERCEL') else 'generated_resumes'
+app.config['ARTIFACT_INDEX_SIZE'] = int(os.getenv('ARTIFACT_INDEX_SIZE', 1000))
+app.config['GENERATED_MAX_BYTES'] = int(os.getenv('GENERATED_MAX_BYTES', 256 * 1024 * 1024))
+app.config['GENERATED_TTL'] = float(os.getenv('GENERATED_TTL', 7 * 24 * 60 * 60))
+artifact_store = ArtifactStore(
+    app.config['GENERATED_FOLDER'],
+    max_entries=app.config['ARTIFACT_INDEX_SIZE'],
+    max_bytes=app.config['GENERATED_MAX_BYTES'],
+    ttl=app.config['GENERATED_TTL']
+)
+artifact_flight = SingleFlight()
+
+# Background sweep of both directories every STORAGE_SWEEP_INTERVAL seconds (0 = only on writes)
+app.config['STORAGE_SWEEP_INTERVAL'] = float(os.getenv('STORAGE_SWEEP_INTERVAL', 300))
+storage_sweeper = StorageSweeper([upload_storage, artifact_store.storage], app.config['STORAGE_SWEEP_INTERVAL']).start()
+
+# PDF rendering runs on a pool of warm worker processes (0 = in the request thread) with a queue-depth limit
+app.config['PDF_RENDER_WORKERS'] = int(os.getenv('PDF_RENDER_WORKERS', min(2, os.cpu_count() or 1)))
+app.config['PDF_RENDER_MAX_QUEUE'] = int(os.getenv('PDF_RENDER_MAX_QUEUE', 16))
+app.config['PDF_RENDER_TIMEOUT'] = float(os.getenv('PDF_RENDER_TIMEOUT', 30))
+app.config['PDF_RENDER_WARM'] = os.getenv('PDF_RENDER_WARM', 'true').lower() in ('1', 'true', 'yes')
+pdf_renderer = PDFRenderPool(
+    workers=app.config['PDF_RENDER_WORKERS'],
+    max_queue=app.config['PDF_RENDER_MAX_QUEUE'],
+    timeout=app.config['PDF_RENDER_TIMEOUT']
+) if REPORTLAB_AVAILABLE else None
+if pdf_renderer is not None and app.config['PDF_RENDER_WARM']:
+    # Start the workers in the background so the first /generate does not pay for it
+    threading.Thread(target=pdf_renderer.warm, name='pdf-render-warmup', daemon=True).start()
+
+# Bulk generation: jobs per /generate/bulk request and jobs rendered concurrently while the ZIP streams
+app.config['BULK_MAX_JOBS'] = int(os.getenv('BULK_MAX_JOBS', 500))
+app.config['BULK_WORKERS'] = int(os.getenv('BULK_WORKERS', 4))
 
 # Hugging Face API configuration
 HF_API_KEY = os.getenv('HF_API_KEY', 'your-hf-api-key-here')
 HF_API_URL = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-medium"
+# Real inference is off by default; analysis then returns demo data. HF_API_BASE can point at inference_stub.py
+app.config['AI_ANALYSIS_ENABLED'] = os.getenv('AI_ANALYSIS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+# Analysis backend: local (taxonomy + ATS rules, no network), remote (inference API), hybrid (local skills,
+# remote rating/suggestions/summary) or demo; empty picks remote or demo from AI_ANALYSIS_ENABLED
+app.config['ANALYSIS_BACKEND'] = os.getenv('ANALYSIS_BACKEND', '').lower()
+app.config['HF_API_BASE'] = os.getenv('HF_API_BASE', DEFAULT_API_BASE)
+app.config['HF_TIMEOUT'] = float(os.getenv('HF_TIMEOUT', 10))
+app.config['HF_MAX_CONCURRENCY'] = int(os.getenv('HF_MAX_CONCURRENCY', 5))
+
+# Inference responses cached by model + prompt + parameters; the SQLite tier is shared by all workers
+app.config['PROMPT_CACHE_SIZE'] = int(os.getenv('PROMPT_CACHE_SIZE', 512))
+app.config['PROMPT_CACHE_TTL'] = float(os.getenv('PROMPT_CACHE_TTL', 24 * 60 * 60))
+app.config['PROMPT_CACHE_DB'] = os.getenv('PROMPT_CACHE_DB', '')
+app.config['PROMPT_CACHE_MAX_ENTRIES'] = int(os.getenv('PROMPT_CACHE_MAX_ENTRIES', 10000))
+prompt_cache = TieredCache(
+    maxsize=app.config['PROMPT_CACHE_SIZE'],
+    ttl=app.config['PROMPT_CACHE_TTL'] or None,
+    disk=SQLiteCache(
+        app.config['PROMPT_CACHE_DB'],
+        max_entries=app.config['PROMPT_CACHE_MAX_ENTRIES'],
+        ttl=app.config['PROMPT_CACHE_TTL'] or None
+    ) if app.config['PROMPT_CACHE_DB'] else None
+)
+# Backpressure: adaptive request rate (per second), circuit breaker, and the latency budget of one analysis
+app.config['HF_RATE_LIMIT'] = float(os.getenv('HF_RATE_LIMIT', 10))
+app.config['HF_RATE_BURST'] = int(os.getenv('HF_RATE_BURST', 10))
+app.config['BREAKER_FAILURE_THRESHOLD'] = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+app.config['BREAKER_RESET_TIMEOUT'] = float(os.getenv('BREAKER_RESET_TIMEOUT', 30))
+app.config['ANALYSIS_DEADLINE'] = float(os.getenv('ANALYSIS_DEADLINE', 20))
+
+# Identical prompts in flight share one request; with a lock directory (and PROMPT_CACHE_DB) across workers too
+app.config['SINGLE_FLIGHT_LOCK_DIR'] = os.getenv('SINGLE_FLIGHT_LOCK_DIR', '')
+# Prompts from concurrent analyses are sent together as list inputs; batch size 1 disables batching
+app.config['INFERENCE_BATCH_SIZE'] = int(os.getenv('INFERENCE_BATCH_SIZE', 8))
+app.config['INFERENCE_BATCH_WAIT_MS'] = float(os.getenv('INFERENCE_BATCH_WAIT_MS', 10))
+inference_client = InferenceClient(
+    api_key=HF_API_KEY,
+    api_base=app.config['HF_API_BASE'],
+    timeout=app.config['HF_TIMEOUT'],
+    max_concurrency=app.config['HF_MAX_CONCURRENCY'],
+    cache=prompt_cache,
+    single_flight=SingleFlight(app.config['SINGLE_FLIGHT_LOCK_DIR'] or None),
+    max_batch_size=app.config['INFERENCE_BATCH_SIZE'],
+    max_batch_wait_ms=app.config['INFERENCE_BATCH_WAIT_MS'],
+    limiter=TokenBucket(app.config['HF_RATE_LIMIT'], app.config['HF_RATE_BURST']) if app.config['HF_RATE_LIMIT'] else None,
+    breaker=CircuitBreaker(app.config['BREAKER_FAILURE_THRESHOLD'], app.config['BREAKER_RESET_TIMEOUT'])
+)
+
+# Resume templates from Config.RESUME_TEMPLATES and templates/resumes/, compiled once at startup
+resume_templates = TemplateRegistry(Config.RESUME_TEMPLATES)
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf'}
@@ -42,113 +234,407 @@ ALLOWED_EXTENSIONS = {'pdf'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF file"""
+def extract_pdf(pdf_file, min_parallel_pages=None, max_chars=None, max_pages=None, start_page=0):
+    """Extract text and page statistics from a PDF using the configured time budgets"""
+    if min_parallel_pages is None:
+        min_parallel_pages = app.config['PDF_PARALLEL_MIN_PAGES']
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        pdf_bytes = pdf_file if isinstance(pdf_file, (bytes, bytearray)) else pdf_file.read()
+        return extract_pdf_text(
+            bytes(pdf_bytes),
+            workers=app.config['PDF_WORKERS'],
+            page_timeout=app.config['PDF_PAGE_TIMEOUT'],
+            doc_timeout=app.config['PDF_DOC_TIMEOUT'],
+            min_parallel_pages=min_parallel_pages,
+            max_chars=max_chars,
+            max_pages=max_pages,
+            start_page=start_page
+        )
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
         return None
 
+def extract_text_from_pdf(pdf_file):
+    """Extract text from a PDF file object or raw PDF bytes"""
+    extraction = extract_pdf(pdf_file)
+    return extraction['text'] if extraction else None
+
 def query_huggingface_api(prompt, model="microsoft/DialoGPT-medium"):
     """Query Hugging Face API for resume analysis"""
-    try:
-        API_URL = f"https://api-inference.huggingface.co/models/{model}"
-        headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-        
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_length": 1000,
-                "temperature": 0.7,
-                "return_full_text": False
-            }
-        }
-        
-        response = requests.post(API_URL, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"API Error: {response.status_code} - {response.text}")
-            return None
-    except Exception as e:
-        print(f"Error querying Hugging Face API: {e}")
-        return None
+    return inference_client.query(prompt, model=model)
+
+# Analysis prompt name -> the key of the analysis section it fills
+ANALYSIS_SECTIONS = {
+    "highlights": "highlights",
+    "rating": "rating",
+    "suggestions": "suggestions",
+    "summary": "summary",
+    "skills": "missing_skills"
+}
+
+# Sections the hybrid backend fills from the skill taxonomy instead of the inference API
+LOCAL_SECTIONS = ("highlights", "skills")
+
+def analysis_backend():
+    """The configured analysis backend: 'local', 'remote', 'hybrid' or 'demo'"""
+    backend = app.config['ANALYSIS_BACKEND']
+    if backend in ('local', 'remote', 'hybrid', 'demo'):
+        return backend
+    return 'remote' if app.config['AI_ANALYSIS_ENABLED'] else 'demo'
+
+# Longest resume excerpt sent in one prompt, and the most of each section sent for suggestions
+PROMPT_CHAR_LIMIT = 2000
+PROMPT_SECTION_CHARS = 400
+
+def build_analysis_prompts(resume_text):
+    """Analysis prompts, each given only the resume sections it needs
+    
+    Falls back to the start of the resume when the sections a prompt needs
+    were not found.
+    """
+    bodies = section_segmenter.texts(resume_text)
+    excerpt = resume_text[:PROMPT_CHAR_LIMIT]
+    
+    def sections_text(names, limit=PROMPT_CHAR_LIMIT):
+        parts = [f"{name.title()}: {bodies[name]}" for name in names if name in bodies]
+        return '\n'.join(parts)[:limit] if parts else excerpt
+    
+    if bodies:
+        outline = '\n'.join(f"{name.title()}: {body[:PROMPT_SECTION_CHARS]}" for name, body in bodies.items())
+    else:
+        outline = excerpt
+    return {
+        "highlights": f"Extract key highlights from this resume: {sections_text(['experience', 'projects', 'skills'])}",
+        "rating": f"Rate this resume from 0-10 and provide brief feedback: {excerpt}",
+        "suggestions": f"Provide section-wise suggestions for this resume: {outline[:PROMPT_CHAR_LIMIT]}",
+        "summary": f"Generate a 2-line professional summary for this resume: {sections_text(['summary', 'experience'])}",
+        "skills": f"Extract skills and keywords from this resume: {sections_text(['skills'])}"
+    }
+
+def iter_analysis_sections(resume_text, results, target_job=None, job_description=None):
+    """Fill `results` section by section, yielding each prompt name as its section is ready
+    
+    With AI enabled, sections arrive in the order their prompts complete, so
+    fast prompts are not held up by the slowest one. Locally found missing
+    skills are those of `target_job` or `job_description`.
+    """
+    analysis_prompts = build_analysis_prompts(resume_text)
+    
+    backend = analysis_backend()
+    if backend == 'demo':
+        # For demo purposes, we'll use mock data since Hugging Face API might have rate limits
+        # In production, you would call the actual API
+        results.update({
+            "highlights": {
+                "skills": ["Python", "Flask", "Machine Learning", "Data Analysis", "SQL"],
+                "projects": ["Resume Analyzer App", "E-commerce Platform", "Data Visualization Dashboard"],
+                "keywords": ["Python", "Flask", "AI", "Machine Learning", "Web Development", "Data Science"]
+            },
+            "rating": {
+                "score": 7.5,
+                "feedback": "Good technical skills and project experience. Consider adding more quantifiable achievements and industry-specific keywords."
+            },
+            "suggestions": {
+                "summary": "Add a compelling professional summary highlighting your key achievements and career objectives.",
+                "skills": "Organize skills by category (Technical, Soft Skills, Tools) and add proficiency levels.",
+                "experience": "Include quantifiable metrics and achievements in your work experience descriptions.",
+                "education": "Add relevant coursework, certifications, or academic projects if applicable.",
+                "projects": "Provide live links or GitHub repositories for your projects."
+            },
+            "summary": "Experienced Python developer with expertise in Flask, machine learning, and data analysis. Proven track record of building scalable web applications and implementing AI solutions.",
+            "missing_skills": ["Docker", "AWS", "React", "Agile Methodology", "CI/CD"],
+            "source": "demo"
+        })
+        yield from analysis_prompts
+        return
+    
+    results.update(fallback_analysis(resume_text, target_job, job_description))
+    if backend == 'local':
+        results["source"] = "local"
+        results["rating"]["feedback"] = "Rated locally from ATS checks."
+        yield from analysis_prompts
+        return
+    if backend == 'hybrid':
+        # Skills come from the taxonomy; only the prompts that need a language model are sent
+        for name in LOCAL_SECTIONS:
+            del analysis_prompts[name]
+            yield name
+    
+    # Fail fast to the local analysis while the backend is unhealthy
+    if not inference_client.available():
+        yield from analysis_prompts
+        return
+    
+    # All prompts go out at once and must finish within the analysis latency budget
+    deadline = time.monotonic() + app.config['ANALYSIS_DEADLINE'] if app.config['ANALYSIS_DEADLINE'] else None
+    ai_output = dict.fromkeys(analysis_prompts)
+    for name, response in inference_client.iter_many(analysis_prompts, deadline=deadline):
+        text = generated_text(response)
+        ai_output[name] = text
+        if text:
+            results["source"] = "hybrid" if backend == 'hybrid' else "ai"
+            results["ai_output"] = ai_output
+            if name == "summary":
+                results["summary"] = text
+            elif name == "rating":
+                results["rating"]["feedback"] = text
+        yield name
+
+def analysis_section(name, results):
+    """Event payload for one finished analysis section"""
+    key = ANALYSIS_SECTIONS[name]
+    section = {'name': name, 'key': key, 'value': results.get(key)}
+    if results.get('ai_output', {}).get(name):
+        section['ai_output'] = results['ai_output'][name]
+    return section
 
 def analyze_resume_with_ai(resume_text):
     """Analyze resume using AI and return structured results"""
+    results = {}
+    for _ in iter_analysis_sections(resume_text, results):
+        pass
+    return results
+
+def local_skills(resume_text, target_job=None, job_description=None, max_missing=5):
+    """Skills found in the resume and the target job's skills it lacks, from the skill taxonomy
     
-    # Create analysis prompts
-    analysis_prompts = {
-        "highlights": f"Extract key highlights from this resume: {resume_text[:2000]}",
-        "rating": f"Rate this resume from 0-10 and provide brief feedback: {resume_text[:2000]}",
-        "suggestions": f"Provide section-wise suggestions for this resume: {resume_text[:2000]}",
-        "summary": f"Generate a 2-line professional summary for this resume: {resume_text[:2000]}",
-        "skills": f"Extract skills and keywords from this resume: {resume_text[:2000]}"
+    Missing skills are ranked by their weight in the job's TF-IDF vector,
+    so the ones that matter most to the job come first.
+    """
+    found = skill_taxonomy.extract(resume_text)
+    present = set(found['skills'])
+    job_text = job_matcher.job_text(target_job or 'Software Developer', job_description)
+    job_vector = job_matcher.job_vector(job_text)
+    vocabulary = job_matcher.vocabulary
+    weights = {
+        skill: max([job_vector.get(term_id, 0.0) for term_id in vocabulary.term_counts(skill)] or [0.0])
+        for skill in skill_taxonomy.extract(job_text)['skills'] if skill not in present
+    }
+    return {
+        'skills': found['skills'][:15],
+        'categories': found['categories'],
+        'missing_skills': sorted(weights, key=lambda skill: -weights[skill])[:max_missing]
     }
+
+def fallback_analysis(resume_text, target_job=None, job_description=None):
+    """Local analysis from the skill taxonomy, the job-matching vocabulary and ATS rules"""
+    vocabulary = job_matcher.vocabulary
+    counts = vocabulary.term_counts(resume_text)
+    ranked = sorted(counts, key=lambda term_id: (-counts[term_id] * vocabulary.idf[term_id], vocabulary.labels[term_id]))
+    keywords = list(dict.fromkeys(vocabulary.labels[term_id] for term_id in ranked))[:10]
+    if skill_taxonomy is not None:
+        found = local_skills(resume_text, target_job, job_description)
+        highlights = {"skills": found['skills'], "projects": [], "keywords": keywords, "categories": found['categories']}
+        missing_skills = found['missing_skills']
+    else:
+        highlights = {"skills": keywords, "projects": [], "keywords": keywords}
+        missing_skills = job_matcher.match(resume_text, target_job or 'Software Developer', job_description, max_missing=5)['missing_terms']
     
-    results = {}
+    ats_result = score_resume(resume_text)
+    matched = {entry['rule']: entry['matched'] for entry in ats_result['breakdown']}
+    suggestions = {}
+    if matched.get('email') is False or matched.get('phone') is False:
+        suggestions['contact'] = "Add an email address and phone number at the top of the resume."
+    if matched.get('length') is False:
+        suggestions['length'] = "Expand the resume with more detail on your experience and projects."
+    # Prefer real headings over section names mentioned anywhere in the text
+    headings = {section['name'] for section in ats_result['sections']}
+    for name, terms, _, _ in ats_scorer.groups:
+        if name == 'sections':
+            if headings:
+                missing_sections = [term for term in terms if section_segmenter.headings.get(term, term) not in headings]
+            else:
+                missing_sections = [term for term in terms if term not in (matched.get(name) or [])]
+            if missing_sections:
+                suggestions['sections'] = f"Add clearly labelled sections for: {', '.join(missing_sections)}."
+        elif name == 'action_verbs' and not matched.get(name):
+            suggestions['experience'] = "Start experience bullet points with action verbs such as developed, led or built."
     
-    # For demo purposes, we'll use mock data since Hugging Face API might have rate limits
-    # In production, you would call the actual API
-    results = {
-        "highlights": {
-            "skills": ["Python", "Flask", "Machine Learning", "Data Analysis", "SQL"],
-            "projects": ["Resume Analyzer App", "E-commerce Platform", "Data Visualization Dashboard"],
-            "keywords": ["Python", "Flask", "AI", "Machine Learning", "Web Development", "Data Science"]
-        },
+    sentences = re.split(r'(?<=[.!?])\s+', ' '.join(resume_text.split()))
+    return {
+        "highlights": highlights,
         "rating": {
-            "score": 7.5,
-            "feedback": "Good technical skills and project experience. Consider adding more quantifiable achievements and industry-specific keywords."
-        },
-        "suggestions": {
-            "summary": "Add a compelling professional summary highlighting your key achievements and career objectives.",
-            "skills": "Organize skills by category (Technical, Soft Skills, Tools) and add proficiency levels.",
-            "experience": "Include quantifiable metrics and achievements in your work experience descriptions.",
-            "education": "Add relevant coursework, certifications, or academic projects if applicable.",
-            "projects": "Provide live links or GitHub repositories for your projects."
+            "score": round(10 * ats_result['score'] / ats_result['max_score'], 1),
+            "feedback": "Rated locally from ATS checks while AI analysis is unavailable."
         },
-        "summary": "Experienced Python developer with expertise in Flask, machine learning, and data analysis. Proven track record of building scalable web applications and implementing AI solutions.",
-        "missing_skills": ["Docker", "AWS", "React", "Agile Methodology", "CI/CD"]
+        "suggestions": suggestions,
+        "summary": ' '.join(sentences[:2])[:300],
+        "missing_skills": missing_skills,
+        "source": "fallback"
     }
-    
-    return results
 
 def calculate_ats_score(resume_text):
     """Calculate ATS (Applicant Tracking System) readability score"""
-    score = 0
-    max_score = 100
+    return ats_scorer.score(resume_text)['score']
+
+def score_resume(resume_text):
+    """Calculate the ATS score together with its per-rule breakdown and the resume's sections"""
+    return ats_scorer.score(resume_text, sections=section_segmenter.segment(resume_text))
+
+def archive_upload(pdf_bytes, filename):
+    """Keep a copy of an uploaded PDF in UPLOAD_FOLDER, within the upload storage quotas"""
+    try:
+        file_path = upload_storage.path(filename)
+        with open(file_path, 'wb') as f:
+            f.write(pdf_bytes)
+        upload_storage.add(filename)
+        return file_path
+    except OSError as e:
+        print(f"Error archiving upload: {e}")
+        return None
+
+def extraction_summary(extraction):
+    return {
+        'page_count': extraction['page_count'],
+        'pages_extracted': extraction['pages_extracted'],
+        'next_page': extraction['next_page'],
+        'truncated': extraction['truncated']
+    }
+
+def complete_resume_text(pdf_bytes, results, min_parallel_pages=None):
+    """Decode the pages left over by a budgeted extraction, append them to resume_text and rescore
+    
+    The character budget only limits what the analysis prompts see; the ATS
+    score always covers the whole document.
+    """
+    summary = results['extraction']
+    rest = extract_pdf(pdf_bytes, min_parallel_pages=min_parallel_pages, start_page=summary['next_page'])
+    if not rest:
+        return results
     
-    # Check for common ATS-friendly elements
-    if len(resume_text) > 200:
-        score += 20  # Adequate length
+    completed = dict(results)
+    completed['resume_text'] = "\n".join(part for part in (results['resume_text'], rest['text']) if part)
+    ats_result = score_resume(completed['resume_text'])
+    completed['ats_score'] = ats_result['score']
+    completed['ats_breakdown'] = ats_result['breakdown']
+    completed['sections'] = ats_result['sections']
+    completed['extraction'] = {
+        'page_count': summary['page_count'],
+        'pages_extracted': summary['pages_extracted'] + rest['pages_extracted'],
+        'next_page': None,
+        'truncated': summary['truncated'] or rest['truncated']
+    }
+    return completed
+
+def iter_resume_events(pdf_bytes, min_parallel_pages=None, full_text=True):
+    """Extract, analyze and score a PDF step by step, yielding (event, data) as each part is ready
+    
+    Events are 'extraction', 'ats' and one 'section' per analysis section,
+    then 'result' with (results, cache_status) as returned by process_resume.
+    Cached uploads go straight to 'result'.
+    """
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    results = result_cache.get(digest)
+    cache_status = 'hit' if results is not None else 'miss'
+    
+    if results is None:
+        # Extract text straight from the upload stream
+        extraction = extract_pdf(
+            pdf_bytes,
+            min_parallel_pages=min_parallel_pages,
+            max_chars=app.config['EXTRACTION_CHAR_BUDGET'] or None,
+            max_pages=app.config['EXTRACTION_PAGE_BUDGET'] or None
+        )
+        resume_text = extraction['text'] if extraction else None
+        if not resume_text:
+            yield 'result', (None, cache_status)
+            return
+        yield 'extraction', {'resume_id': digest, 'resume_text': resume_text, 'extraction': extraction_summary(extraction)}
+        
+        # The ATS score is ready long before the AI analysis
+        ats_result = score_resume(resume_text)
+        yield 'ats', {'ats_score': ats_result['score'], 'ats_breakdown': ats_result['breakdown'], 'sections': ats_result['sections']}
+        
+        # Analyze resume with AI
+        analysis_results = {}
+        for name in iter_analysis_sections(resume_text, analysis_results):
+            yield 'section', analysis_section(name, analysis_results)
+        
+        results = {
+            'resume_id': digest,
+            'resume_text': resume_text,
+            'analysis': analysis_results,
+            'ats_score': ats_result['score'],
+            'ats_breakdown': ats_result['breakdown'],
+            'sections': ats_result['sections'],
+            'extraction': extraction_summary(extraction)
+        }
     
-    # Check for contact information
-    if re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', resume_text):
-        score += 15  # Email present
+    updated = cache_status == 'miss'
+    if full_text and results['extraction']['next_page'] is not None:
+        results = complete_resume_text(pdf_bytes, results, min_parallel_pages)
+        updated = True
     
-    if re.search(r'\(\d{3}\)\s*\d{3}-\d{4}|\d{3}-\d{3}-\d{4}', resume_text):
-        score += 15  # Phone number present
+    # Partial extractions are not cached so a retry can get the full text
+    if updated and not results['extraction']['truncated']:
+        result_cache.set(digest, results)
+    yield 'result', (results, cache_status)
+
+def process_resume(pdf_bytes, min_parallel_pages=None, full_text=True):
+    """Extract, analyze and score a PDF, serving repeated uploads from the result cache
     
-    # Check for section headers
-    sections = ['experience', 'education', 'skills', 'summary', 'objective']
-    for section in sections:
-        if section in resume_text.lower():
-            score += 10
+    Analysis runs on the first EXTRACTION_CHAR_BUDGET characters; the rest of
+    the document is only decoded when `full_text` is requested.
     
-    # Check for action verbs
-    action_verbs = ['developed', 'created', 'implemented', 'managed', 'led', 'designed', 'built']
-    for verb in action_verbs:
-        if verb in resume_text.lower():
-            score += 5
-            break
+    Returns (results, cache_status) where cache_status is 'hit' or 'miss';
+    results is None when no text could be extracted.
+    """
+    for event, data in iter_resume_events(pdf_bytes, min_parallel_pages, full_text):
+        if event == 'result':
+            return data
+
+def index_terms(analysis, resume_text, target_job=None, job_description=None):
+    """Terms a resume is searchable by: skills and keywords found in its text, plus missing:<skill>
     
-    return min(score, max_score)
+    Terms are matched on the resume text against the skill taxonomy and the
+    job-matching vocabulary, so every resume is indexed by what it says.
+    Missing skills are those of `target_job` (Software Developer by default).
+    Skills reported by an analysis are added too, except the demo data.
+    """
+    vocabulary = job_matcher.vocabulary
+    terms = [vocabulary.labels[term_id] for term_id in vocabulary.term_counts(resume_text)]
+    if skill_taxonomy is not None:
+        found = local_skills(resume_text, target_job, job_description)
+        terms += found['skills']
+        missing_skills = found['missing_skills']
+    else:
+        missing_skills = job_matcher.match(resume_text, target_job or 'Software Developer', job_description,
+                                           max_missing=5)['missing_terms']
+    if analysis.get('source') not in (None, 'demo'):
+        highlights = analysis.get('highlights', {})
+        terms += list(highlights.get('skills', [])) + list(highlights.get('keywords', []))
+        missing_skills = analysis.get('missing_skills', missing_skills)
+    terms += [f"missing:{skill}" for skill in missing_skills]
+    return list(dict.fromkeys(terms))
+
+def add_to_corpus(resume_id, filename, resume_text):
+    """Store a resume's term vector for ranking; vectors are computed once per resume"""
+    if corpus_store is None or resume_id in corpus_store:
+        return
+    try:
+        corpus_store.add(resume_id, filename, job_matcher.vocabulary.vectorize(resume_text))
+    except Exception as e:
+        print(f"Error adding resume to ranking corpus: {e}")
+
+def add_full_text_to_corpus(pdf_bytes, results, filename):
+    """Decode the pages past the analysis budget and add the full text to the ranking corpus"""
+    if corpus_store is None or results['resume_id'] in corpus_store:
+        return
+    completed = complete_resume_text(pdf_bytes, results)
+    if completed['extraction']['next_page'] is None:
+        add_to_corpus(results['resume_id'], filename, completed['resume_text'])
+
+def index_resume(results, filename, pdf_bytes=None):
+    """Add an analyzed resume to the skill index and the ranking corpus"""
+    try:
+        skill_index.add(results['resume_id'], filename, index_terms(results['analysis'], results['resume_text']))
+    except Exception as e:
+        print(f"Error indexing resume: {e}")
+    # Vectors are never recomputed, so only the full text is vectorized
+    if results['extraction']['next_page'] is None:
+        add_to_corpus(results['resume_id'], filename, results['resume_text'])
+    elif pdf_bytes is not None and corpus_store is not None and results['resume_id'] not in corpus_store:
+        corpus_executor.submit(add_full_text_to_corpus, pdf_bytes, results, filename)
 
 @app.route('/')
 def index():
@@ -165,26 +651,35 @@ def upload_file():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        pdf_bytes = file.read()
         
-        # Extract text from PDF
-        with open(file_path, 'rb') as pdf_file:
-            resume_text = extract_text_from_pdf(pdf_file)
+        # Only write to disk when archiving is enabled
+        if app.config['ARCHIVE_UPLOADS']:
+            archive_upload(pdf_bytes, filename)
         
-        if resume_text:
-            # Analyze resume with AI
-            analysis_results = analyze_resume_with_ai(resume_text)
-            ats_score = calculate_ats_score(resume_text)
-            
+        # Clients that do not display resume_text can skip decoding pages past the analysis budget
+        full_text = request.form.get('full_text', request.args.get('full_text', 'true')).lower() != 'false'
+        
+        # Job mode answers at once; the work runs on the background job workers
+        job_mode = request.form.get('async', request.args.get('async', str(app.config['UPLOAD_JOB_MODE'])))
+        if is_enabled(job_mode):
+            return enqueue_upload(pdf_bytes, filename, full_text)
+        
+        # Streaming clients get each part of the result as soon as it is ready
+        if is_enabled(request.form.get('stream', request.args.get('stream', 'false'))):
+            return sse_response(stream_upload_events(pdf_bytes, filename, full_text))
+        
+        processed, cache_status = process_resume(pdf_bytes, full_text=full_text)
+        
+        if processed:
             # Store results in session or database
-            results = {
+            index_resume(processed, filename, pdf_bytes)
+            results = dict(processed)
+            results.update({
                 'filename': filename,
-                'resume_text': resume_text,
-                'analysis': analysis_results,
-                'ats_score': ats_score,
+                'cache': cache_status,
                 'timestamp': datetime.now().isoformat()
-            }
+            })
             
             return jsonify(results)
         else:
@@ -192,30 +687,322 @@ def upload_file():
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+def stream_upload_events(pdf_bytes, filename, full_text):
+    """Server-Sent Events for a streaming /upload; the 'done' event carries the usual response body"""
+    for event, data in iter_resume_events(pdf_bytes, full_text=full_text):
+        if event != 'result':
+            yield sse_event(event, data)
+            continue
+        processed, cache_status = data
+        if not processed:
+            yield sse_event('error', {'error': 'Could not extract text from PDF'})
+            return
+        index_resume(processed, filename, pdf_bytes)
+        results = dict(processed)
+        results.update({
+            'filename': filename,
+            'cache': cache_status,
+            'timestamp': datetime.now().isoformat()
+        })
+        yield sse_event('done', results)
+
+def enqueue_upload(pdf_bytes, filename, full_text):
+    """Store an upload for the job workers and return the 202 response with its job ID"""
+    try:
+        os.makedirs(app.config['JOB_STORAGE_DIR'], exist_ok=True)
+        path = os.path.join(app.config['JOB_STORAGE_DIR'], f"{uuid.uuid4().hex}.pdf")
+        with open(path, 'wb') as f:
+            f.write(pdf_bytes)
+        job_id = job_queue.enqueue('upload', {'path': path, 'filename': filename, 'full_text': full_text})
+    except Exception as e:
+        print(f"Error queueing upload: {e}")
+        return jsonify({'error': 'Could not queue upload'}), 500
+    return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f"/jobs/{job_id}"}), 202
+
+def run_upload_job(payload):
+    """Job handler: process a stored upload exactly like a synchronous /upload"""
+    try:
+        with open(payload['path'], 'rb') as f:
+            pdf_bytes = f.read()
+        processed, cache_status = process_resume(pdf_bytes, full_text=payload.get('full_text', True))
+        if not processed:
+            raise ValueError('Could not extract text from PDF')
+        index_resume(processed, payload['filename'], pdf_bytes)
+        results = dict(processed)
+        results.update({
+            'filename': payload['filename'],
+            'cache': cache_status,
+            'timestamp': datetime.now().isoformat()
+        })
+        return results
+    finally:
+        if os.path.exists(payload['path']):
+            os.remove(payload['path'])
+
+job_queue.register('upload', run_upload_job)
+
+# Resume jobs queued before a restart, or left running by a crashed process
+try:
+    job_queue.resume()
+except Exception as e:
+    print(f"Error resuming queued jobs: {e}")
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] in ('queued', 'running'):
+        # Another process may have queued it; make sure this one is working too
+        job_queue.start()
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'created': datetime.fromtimestamp(job['created']).isoformat()
+    }
+    if job['status'] == 'done':
+        response['result'] = job['result']
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+    return jsonify(response)
+
+def process_batch_item(index, filename, pdf_bytes):
+    """Process one file of a batch upload into a single NDJSON record"""
+    record = {'index': index, 'filename': filename}
+    if not allowed_file(filename):
+        record['error'] = 'Invalid file type'
+        return record
+    
+    if app.config['ARCHIVE_UPLOADS']:
+        archive_upload(pdf_bytes, filename)
+    
+    # Every page range goes to the extraction pool so CPU work runs outside the GIL
+    processed, cache_status = process_resume(pdf_bytes, min_parallel_pages=1)
+    if not processed:
+        record['error'] = 'Could not extract text from PDF'
+        return record
+    
+    index_resume(processed, filename, pdf_bytes)
+    record.update(processed)
+    record.update({
+        'cache': cache_status,
+        'timestamp': datetime.now().isoformat()
+    })
+    return record
+
+@app.route('/upload/batch', methods=['POST'])
+def upload_batch():
+    files = [f for f in request.files.getlist('files') + request.files.getlist('file') if f.filename]
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+    
+    # Read everything up front; the response body is produced after the request is gone
+    items = [(secure_filename(f.filename), f.read()) for f in files]
+    
+    def generate():
+        executor = ThreadPoolExecutor(max_workers=max(1, app.config['BATCH_WORKERS']))
+        succeeded = 0
+        try:
+            futures = {
+                executor.submit(process_batch_item, index, filename, pdf_bytes): (index, filename)
+                for index, (filename, pdf_bytes) in enumerate(items)
+            }
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    index, filename = futures[future]
+                    print(f"Error processing batch item {filename}: {e}")
+                    record = {'index': index, 'filename': filename, 'error': 'Processing failed'}
+                if 'error' not in record:
+                    succeeded += 1
+                yield json.dumps(record) + '\n'
+            yield json.dumps({'done': True, 'total': len(items), 'succeeded': succeeded}) + '\n'
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/search')
+def search_resumes():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    limit = request.args.get('limit', 50, type=int)
+    
+    started = datetime.now()
+    try:
+        total, resume_ids = skill_index.search(query, limit=max(0, limit))
+    except QueryError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    took_ms = (datetime.now() - started).total_seconds() * 1000
+    
+    return jsonify({
+        'query': query,
+        'total': total,
+        'results': [skill_index.describe(resume_id) for resume_id in resume_ids],
+        'took_ms': round(took_ms, 3)
+    })
+
+@app.route('/rank', methods=['POST'])
+def rank_resumes():
+    if corpus_store is None:
+        return jsonify({'error': 'Ranking is not available'}), 503
+    
+    data = request.get_json() or {}
+    target_job = data.get('target_job', '')
+    job_description = data.get('job_description', '')
+    if not target_job and not job_description:
+        return jsonify({'error': 'No job description provided'}), 400
+    try:
+        k = int(data.get('k', 10))
+        page = int(data.get('page', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k and page must be integers'}), 400
+    if k < 1 or page < 1:
+        return jsonify({'error': 'k and page must be positive'}), 400
+    k = min(k, app.config['RANKING_MAX_K'])
+    
+    started = datetime.now()
+    job_vector = job_matcher.job_vector(job_matcher.job_text(target_job, job_description))
+    total, results = corpus_store.top_k(job_vector, len(job_matcher.vocabulary), k=k, page=page)
+    took_ms = (datetime.now() - started).total_seconds() * 1000
+    
+    return jsonify({
+        'total': total,
+        'corpus_size': len(corpus_store),
+        'k': k,
+        'page': page,
+        'has_more': page * k < total,
+        'results': results,
+        'took_ms': round(took_ms, 3)
+    })
+
+@app.route('/api/render/status')
+def render_status():
+    status = pdf_renderer.stats() if pdf_renderer is not None else {}
+    status['available'] = REPORTLAB_AVAILABLE
+    return jsonify(status)
+
+@app.route('/api/storage/status')
+def storage_status():
+    return jsonify({
+        'uploads': upload_storage.stats(),
+        'generated': artifact_store.stats()
+    })
+
+@app.route('/api/cache/status')
+def result_cache_status():
+    # Analysis results of uploads, keyed by PDF content hash
+    return jsonify({'results': result_cache.stats()})
+
+@app.route('/api/inference/status')
+def inference_status():
+    status = inference_client.stats()
+    status['enabled'] = app.config['AI_ANALYSIS_ENABLED']
+    status['backend'] = analysis_backend()
+    status['available'] = inference_client.available()
+    return jsonify(status)
+
+def compare_to_job(resume_text, target_job, job_description):
+    """Job comparison of a resume against a job description, or the title's usual requirements"""
+    match = job_matcher.match(resume_text, target_job, job_description)
+    return {
+        'target_job': target_job,
+        'missing_skills': match['missing_terms'],
+        'matched_skills': match['matched_terms'],
+        'match_percentage': match['match_percentage'],
+        'similarity': match['similarity']
+    }
+
+def full_resume_text(pdf_bytes):
+    """The whole text of an uploaded PDF, completing its cached analysis when the budget cut it short"""
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    results = result_cache.get(digest)
+    if results is None:
+        extraction = extract_pdf(pdf_bytes)
+        return extraction['text'] if extraction else None
+    if results['extraction']['next_page'] is not None:
+        results = complete_resume_text(pdf_bytes, results)
+        if not results['extraction']['truncated']:
+            result_cache.set(digest, results)
+    return results['resume_text']
+
+def iter_analyze_events(resume_text, target_job, job_description):
+    """Score, match and analyze resume text, yielding (event, data) as each part is ready
+    
+    Events are 'ats', 'job_comparison' and one 'section' per analysis
+    section, then 'result' with the full /analyze response.
+    """
+    ats_result = score_resume(resume_text)
+    yield 'ats', {'ats_score': ats_result['score'], 'ats_breakdown': ats_result['breakdown'], 'sections': ats_result['sections']}
+    
+    # Add job comparison against the description, or the title's usual requirements
+    job_comparison = compare_to_job(resume_text, target_job, job_description)
+    yield 'job_comparison', job_comparison
+    
+    # Analyze resume with AI
+    analysis_results = {}
+    for name in iter_analysis_sections(resume_text, analysis_results, target_job, job_description):
+        yield 'section', analysis_section(name, analysis_results)
+    analysis_results['job_comparison'] = job_comparison
+    
+    yield 'result', {
+        'analysis': analysis_results,
+        'ats_score': ats_result['score'],
+        'ats_breakdown': ats_result['breakdown'],
+        'sections': ats_result['sections']
+    }
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    # Proxies must not buffer the stream, or every event arrives at the end
+    return Response(events, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def is_enabled(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
 @app.route('/analyze', methods=['POST'])
 def analyze_resume():
     data = request.get_json()
     resume_text = data.get('resume_text', '')
     target_job = data.get('target_job', 'Software Developer')
+    job_description = data.get('job_description', '')
     
     if not resume_text:
         return jsonify({'error': 'No resume text provided'}), 400
     
-    # Analyze resume with AI
-    analysis_results = analyze_resume_with_ai(resume_text)
-    ats_score = calculate_ats_score(resume_text)
+    events = iter_analyze_events(resume_text, target_job, job_description)
+    if is_enabled(data.get('stream', request.args.get('stream', 'false'))):
+        # The last event carries the same body as the JSON response
+        return sse_response(sse_event('done' if event == 'result' else event, payload) for event, payload in events)
     
-    # Add job comparison
-    analysis_results['job_comparison'] = {
-        'target_job': target_job,
-        'missing_skills': analysis_results.get('missing_skills', []),
-        'match_percentage': 75  # Mock percentage
-    }
+    for event, payload in events:
+        if event == 'result':
+            return jsonify(payload)
+
+@app.route('/match', methods=['POST'])
+def match_job():
+    """Job comparison only, without the ATS score or AI analysis
     
-    return jsonify({
-        'analysis': analysis_results,
-        'ats_score': ats_score
-    })
+    Takes JSON with resume_text, or a form with the PDF as `file`, whose
+    full text is matched even when the upload was analyzed on a budget.
+    """
+    if 'file' in request.files:
+        data = request.form
+        resume_text = full_resume_text(request.files['file'].read())
+    else:
+        data = request.get_json(silent=True) or {}
+        resume_text = data.get('resume_text', '')
+    target_job = data.get('target_job', 'Software Developer')
+    job_description = data.get('job_description', '')
+    
+    if not resume_text:
+        return jsonify({'error': 'No resume text provided'}), 400
+    return jsonify(compare_to_job(resume_text, target_job, job_description))
 
 @app.route('/templates')
 def template_gallery():
@@ -223,33 +1010,7 @@ def template_gallery():
 
 @app.route('/api/templates')
 def api_templates():
-    templates = [
-        {
-            'id': 'modern',
-            'name': 'Modern Professional',
-            'description': 'Clean and contemporary design perfect for tech roles',
-            'preview': '/static/images/template1-preview.png'
-        },
-        {
-            'id': 'classic',
-            'name': 'Classic Executive',
-            'description': 'Traditional format ideal for corporate positions',
-            'preview': '/static/images/template2-preview.png'
-        },
-        {
-            'id': 'creative',
-            'name': 'Creative Portfolio',
-            'description': 'Eye-catching design for creative professionals',
-            'preview': '/static/images/template3-preview.png'
-        },
-        {
-            'id': 'minimal',
-            'name': 'Minimal Tech',
-            'description': 'Minimalist design focused on technical skills',
-            'preview': '/static/images/template4-preview.png'
-        }
-    ]
-    return jsonify(templates)
+    return jsonify(resume_templates.metadata())
 
 @app.route('/generate', methods=['POST'])
 def generate_resume():
@@ -260,384 +1021,211 @@ def generate_resume():
     if not template_id or not resume_data:
         return jsonify({'error': 'Missing template or resume data'}), 400
     
-    # Generate resume HTML based on template
-    html_content = generate_resume_html(template_id, resume_data)
-    
-    # Save HTML file
-    html_filename = f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-    generated_dir = '/tmp/generated_resumes' if os.getenv('VERCEL') else 'generated_resumes'
-    os.makedirs(generated_dir, exist_ok=True)
-    html_path = os.path.join(generated_dir, html_filename)
-    
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    # Generate PDF
-    pdf_filename = f"resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    pdf_path = os.path.join(generated_dir, pdf_filename)
-    
     try:
-        if REPORTLAB_AVAILABLE:
-            # Generate PDF using ReportLab
-            if generate_pdf_with_reportlab(resume_data, pdf_path):
-                return jsonify({
-                    'html_url': f'/download/{html_filename}',
-                    'pdf_url': f'/download/{pdf_filename}',
-                    'success': True
-                })
-            else:
-                return jsonify({
-                    'html_url': f'/download/{html_filename}',
-                    'pdf_url': None,
-                    'success': True,
-                    'message': 'PDF generation failed. HTML version created.'
-                })
-        else:
-            # Fallback: Return HTML only
+        # Same template and data -> same files; only the first request renders them
+        key = artifact_key(ARTIFACT_FORMAT, resume_templates.fingerprint, template_id, resume_data)
+        output = data.get('output')
+        if output in ('html', 'pdf'):
+            return generate_direct(key, template_id, resume_data, output, persist=is_enabled(data.get('persist')))
+        
+        artifacts = artifact_store.get(key)
+        cached = artifacts is not None and (artifacts.get('pdf') is not None or not REPORTLAB_AVAILABLE)
+        if not cached:
+            artifacts = artifact_flight.do(key, lambda: build_artifacts(key, template_id, resume_data))
+        
+        html_filename = artifacts['html']
+        pdf_filename = artifacts.get('pdf')
+        if pdf_filename:
             return jsonify({
                 'html_url': f'/download/{html_filename}',
-                'pdf_url': None,
+                'pdf_url': f'/download/{pdf_filename}',
                 'success': True,
-                'message': 'PDF generation not available. HTML version created.'
+                'cached': cached
             })
+        return jsonify({
+            'html_url': f'/download/{html_filename}',
+            'pdf_url': None,
+            'success': True,
+            'cached': cached,
+            'message': ('PDF generation failed. HTML version created.' if REPORTLAB_AVAILABLE
+                        else 'PDF generation not available. HTML version created.')
+        })
+    except RenderQueueFull:
+        response = jsonify({'error': 'Too many resumes are being generated, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         return jsonify({'error': f'PDF generation failed: {str(e)}'}), 500
 
+# Bump when generate_pdf_with_reportlab changes its output, so stored PDFs are not reused
+ARTIFACT_FORMAT = 1
+
+GENERATED_MIMETYPES = {'html': 'text/html', 'pdf': 'application/pdf'}
+
+def generate_direct(key, template_id, resume_data, output, persist=False):
+    """Send one generated file in the response instead of returning download URLs
+    
+    Files already stored are sent from disk; otherwise the file is rendered in
+    memory and only written to the artifact store when `persist` is set. The
+    artifact key is the ETag, so an unchanged resume answers 304 unrendered.
+    """
+    if request.if_none_match.contains(key):
+        response = Response(status=304)
+        response.set_etag(key)
+        return response
+    
+    stored = artifact_store.get(key) or {}
+    cached = output in stored
+    if persist and not cached:
+        stored = artifact_flight.do(key, lambda: build_artifacts(key, template_id, resume_data))
+    
+    if output in stored:
+        body = artifact_store.path(stored[output])
+    elif output == 'html':
+        body = io.BytesIO(generate_resume_html(template_id, resume_data).encode('utf-8'))
+    else:
+        pdf_bytes = pdf_renderer.render_bytes(resume_data) if REPORTLAB_AVAILABLE else None
+        if pdf_bytes is None:
+            return jsonify({'error': 'PDF generation failed'}), 500
+        body = io.BytesIO(pdf_bytes)
+    
+    response = send_file(body, mimetype=GENERATED_MIMETYPES[output], as_attachment=True,
+                         download_name=f"resume.{output}", etag=False)
+    response.set_etag(key)
+    response.headers['X-Artifact-Cache'] = 'hit' if cached else 'miss'
+    return response
+
+def write_text_file(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def build_artifacts(key, template_id, resume_data):
+    """Render and store the HTML and PDF for an artifact key, skipping files already stored"""
+    artifacts = artifact_store.get(key) or {}
+    if not artifacts.get('html'):
+        html_content = generate_resume_html(template_id, resume_data)
+        artifacts['html'] = artifact_store.put(key, 'html', lambda path: write_text_file(path, html_content))
+    if REPORTLAB_AVAILABLE and not artifacts.get('pdf'):
+        artifacts['pdf'] = artifact_store.put(key, 'pdf', lambda path: generate_pdf_with_reportlab(resume_data, path))
+    return artifacts
+
 def generate_pdf_with_reportlab(resume_data, pdf_path):
-    """Generate PDF using ReportLab"""
+    """Generate PDF using ReportLab on the render pool; raises RenderQueueFull when it is saturated"""
     if not REPORTLAB_AVAILABLE:
         return False
+    return pdf_renderer.render(resume_data, pdf_path)
+
+def generate_resume_html(template_id, resume_data):
+    """Generate HTML resume based on template"""
+    return resume_templates.render(template_id, resume_data)
+
+@app.route('/generate/bulk', methods=['POST'])
+def generate_bulk():
+    data = request.get_json(silent=True) or {}
+    jobs = data.get('jobs')
+    formats = data.get('formats') or ['pdf']
+    
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({'error': 'No jobs given'}), 400
+    if len(jobs) > app.config['BULK_MAX_JOBS']:
+        return jsonify({'error': f"At most {app.config['BULK_MAX_JOBS']} jobs per request"}), 400
+    if not isinstance(formats, list) or any(output not in GENERATED_MIMETYPES for output in formats):
+        return jsonify({'error': 'formats must be a list of html and pdf'}), 400
+    if 'pdf' in formats and not REPORTLAB_AVAILABLE:
+        return jsonify({'error': 'PDF generation not available'}), 400
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict) or not job.get('template_id') or not isinstance(job.get('resume_data'), dict):
+            return jsonify({'error': f'Job {index} is missing template or resume data'}), 400
+    
+    formats = list(dict.fromkeys(formats))
+    response = Response(iter_zip(iter_bulk_entries(jobs, formats)), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=resumes.zip'
+    return response
+
+def iter_bulk_entries(jobs, formats):
+    """Render bulk jobs concurrently and yield their ZIP entries as each job finishes
     
+    At most twice BULK_WORKERS jobs are submitted at a time, so finished files
+    waiting to be written stay bounded however many jobs there are. The last
+    entry is manifest.json with the outcome of every job.
+    """
+    workers = max(1, app.config['BULK_WORKERS'])
+    executor = ThreadPoolExecutor(max_workers=workers)
+    remaining = enumerate(jobs)
+    pending = {}
+    manifest = []
     try:
-        doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        story.append(Paragraph(resume_data.get('name', 'Resume'), title_style))
-        story.append(Spacer(1, 12))
-        
-        # Contact info
-        contact_style = ParagraphStyle(
-            'Contact',
-            parent=styles['Normal'],
-            fontSize=10,
-            alignment=1
-        )
-        contact_info = f"{resume_data.get('email', '')} | {resume_data.get('phone', '')} | {resume_data.get('location', '')}"
-        story.append(Paragraph(contact_info, contact_style))
-        story.append(Spacer(1, 20))
-        
-        # Professional Summary
-        if resume_data.get('summary'):
-            story.append(Paragraph("Professional Summary", styles['Heading2']))
-            story.append(Paragraph(resume_data['summary'], styles['Normal']))
-            story.append(Spacer(1, 12))
-        
-        # Skills
-        if resume_data.get('skills'):
-            story.append(Paragraph("Skills", styles['Heading2']))
-            skills_text = ", ".join(resume_data['skills'])
-            story.append(Paragraph(skills_text, styles['Normal']))
-            story.append(Spacer(1, 12))
+        while True:
+            for index, job in itertools.islice(remaining, workers * 2 - len(pending)):
+                pending[executor.submit(render_bulk_job, index, job, formats)] = index
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    entries, record = future.result()
+                except Exception as e:
+                    print(f"Error generating bulk job {index}: {e}")
+                    entries, record = [], {'index': index, 'files': [], 'error': 'Generation failed'}
+                manifest.append(record)
+                yield from entries
         
-        # Experience
-        if resume_data.get('experience'):
-            story.append(Paragraph("Experience", styles['Heading2']))
-            for exp in resume_data['experience']:
-                story.append(Paragraph(f"<b>{exp.get('title', '')}</b> - {exp.get('company', '')}", styles['Normal']))
-                story.append(Paragraph(f"{exp.get('duration', '')}", styles['Normal']))
-                story.append(Paragraph(exp.get('description', ''), styles['Normal']))
-                story.append(Spacer(1, 8))
-        
-        # Education
-        if resume_data.get('education'):
-            story.append(Paragraph("Education", styles['Heading2']))
-            for edu in resume_data['education']:
-                story.append(Paragraph(f"<b>{edu.get('degree', '')}</b> - {edu.get('institution', '')}", styles['Normal']))
-                story.append(Paragraph(f"{edu.get('year', '')}", styles['Normal']))
-                story.append(Spacer(1, 8))
-        
-        doc.build(story)
-        return True
-    except Exception as e:
-        print(f"Error generating PDF: {e}")
-        return False
+        manifest.sort(key=lambda record: record['index'])
+        summary = {
+            'total': len(jobs),
+            'succeeded': sum(1 for record in manifest if 'error' not in record),
+            'jobs': manifest
+        }
+        yield 'manifest.json', json.dumps(summary, indent=2), True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-def generate_resume_html(template_id, resume_data):
-    """Generate HTML resume based on template"""
+def render_bulk_job(index, job, formats):
+    """Render one bulk job; returns its (name, data, compress) ZIP entries and manifest record"""
+    template_id = job['template_id']
+    resume_data = job['resume_data']
+    key = artifact_key(ARTIFACT_FORMAT, resume_templates.fingerprint, template_id, resume_data)
+    stored = artifact_store.get(key) or {}
+    basename = '_'.join(filter(None, [
+        f"{index + 1:04d}", secure_filename(str(resume_data.get('name') or '')), secure_filename(str(template_id))
+    ]))
     
-    # Escape HTML content to prevent XSS
-    def escape_html(text):
-        if not text:
-            return ""
-        return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&#x27;')
-    
-    name = escape_html(resume_data.get('name', 'Your Name'))
-    title = escape_html(resume_data.get('title', 'Professional Title'))
-    email = escape_html(resume_data.get('email', 'email@example.com'))
-    phone = escape_html(resume_data.get('phone', 'Phone Number'))
-    summary = escape_html(resume_data.get('summary', 'Professional summary goes here...'))
-    experience = escape_html(resume_data.get('experience', 'Work experience details...'))
-    education = escape_html(resume_data.get('education', 'Education details...'))
-    skills = resume_data.get('skills', [])
-    
-    if template_id == 'modern':
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Resume - {name}</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body {{ font-family: 'Arial', sans-serif; margin: 0; padding: 20px; background: #f5f5f5; }}
-                .resume {{ max-width: 800px; margin: 0 auto; background: white; padding: 40px; box-shadow: 0 0 20px rgba(0,0,0,0.1); }}
-                .header {{ text-align: center; border-bottom: 3px solid #2c3e50; padding-bottom: 20px; margin-bottom: 30px; }}
-                .name {{ font-size: 2.5em; color: #2c3e50; margin: 0; }}
-                .title {{ font-size: 1.2em; color: #7f8c8d; margin: 10px 0; }}
-                .contact {{ font-size: 1em; color: #7f8c8d; }}
-                .section {{ margin-bottom: 30px; }}
-                .section-title {{ font-size: 1.4em; color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 5px; margin-bottom: 15px; }}
-                .skills {{ display: flex; flex-wrap: wrap; gap: 10px; }}
-                .skill {{ background: #3498db; color: white; padding: 5px 15px; border-radius: 20px; font-size: 0.9em; }}
-                .experience-item {{ margin-bottom: 20px; }}
-                .experience-title {{ font-weight: bold; color: #2c3e50; }}
-                .experience-company {{ color: #7f8c8d; }}
-                .experience-description {{ margin-top: 5px; line-height: 1.5; }}
-            </style>
-        </head>
-        <body>
-            <div class="resume">
-                <div class="header">
-                    <h1 class="name">{name}</h1>
-                    <p class="title">{title}</p>
-                    <p class="contact">{email} | {phone}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Professional Summary</h2>
-                    <p>{summary}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Skills</h2>
-                    <div class="skills">
-                        {''.join([f'<span class="skill">{escape_html(skill)}</span>' for skill in skills])}
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Experience</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{experience.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Education</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{education.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-    elif template_id == 'classic':
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Resume - {name}</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body {{ font-family: 'Times New Roman', serif; margin: 0; padding: 20px; background: white; }}
-                .resume {{ max-width: 800px; margin: 0 auto; padding: 40px; }}
-                .header {{ border-bottom: 2px solid #000; padding-bottom: 20px; margin-bottom: 30px; }}
-                .name {{ font-size: 2.2em; color: #000; margin: 0; font-weight: bold; }}
-                .title {{ font-size: 1.1em; color: #333; margin: 10px 0; }}
-                .contact {{ font-size: 0.9em; color: #666; }}
-                .section {{ margin-bottom: 25px; }}
-                .section-title {{ font-size: 1.2em; color: #000; border-bottom: 1px solid #ccc; padding-bottom: 3px; margin-bottom: 12px; font-weight: bold; }}
-                .skills {{ display: flex; flex-wrap: wrap; gap: 8px; }}
-                .skill {{ background: #f0f0f0; color: #333; padding: 3px 12px; border-radius: 3px; font-size: 0.85em; border: 1px solid #ccc; }}
-                .experience-item {{ margin-bottom: 15px; }}
-                .experience-description {{ margin-top: 5px; line-height: 1.4; }}
-            </style>
-        </head>
-        <body>
-            <div class="resume">
-                <div class="header">
-                    <h1 class="name">{name}</h1>
-                    <p class="title">{title}</p>
-                    <p class="contact">{email} | {phone}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Professional Summary</h2>
-                    <p>{summary}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Technical Skills</h2>
-                    <div class="skills">
-                        {''.join([f'<span class="skill">{escape_html(skill)}</span>' for skill in skills])}
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Professional Experience</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{experience.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Education</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{education.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-    elif template_id == 'creative':
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Resume - {name}</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body {{ font-family: 'Arial', sans-serif; margin: 0; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); }}
-                .resume {{ max-width: 800px; margin: 0 auto; background: white; padding: 40px; box-shadow: 0 0 30px rgba(0,0,0,0.2); border-radius: 10px; }}
-                .header {{ text-align: center; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; margin: -40px -40px 30px -40px; border-radius: 10px 10px 0 0; }}
-                .name {{ font-size: 2.8em; margin: 0; font-weight: 300; }}
-                .title {{ font-size: 1.3em; margin: 10px 0; opacity: 0.9; }}
-                .contact {{ font-size: 1em; opacity: 0.8; }}
-                .section {{ margin-bottom: 30px; }}
-                .section-title {{ font-size: 1.5em; color: #667eea; border-left: 4px solid #667eea; padding-left: 15px; margin-bottom: 15px; }}
-                .skills {{ display: flex; flex-wrap: wrap; gap: 10px; }}
-                .skill {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 8px 16px; border-radius: 25px; font-size: 0.9em; }}
-                .experience-item {{ margin-bottom: 20px; }}
-                .experience-description {{ margin-top: 8px; line-height: 1.6; }}
-            </style>
-        </head>
-        <body>
-            <div class="resume">
-                <div class="header">
-                    <h1 class="name">{name}</h1>
-                    <p class="title">{title}</p>
-                    <p class="contact">{email} | {phone}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">About Me</h2>
-                    <p>{summary}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Skills & Expertise</h2>
-                    <div class="skills">
-                        {''.join([f'<span class="skill">{escape_html(skill)}</span>' for skill in skills])}
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Experience</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{experience.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Education</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{education.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-    else:  # minimal template
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Resume - {name}</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body {{ font-family: 'Helvetica', sans-serif; margin: 0; padding: 20px; background: #fafafa; }}
-                .resume {{ max-width: 700px; margin: 0 auto; background: white; padding: 30px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                .header {{ margin-bottom: 30px; }}
-                .name {{ font-size: 2em; color: #333; margin: 0; font-weight: 300; }}
-                .title {{ font-size: 1.1em; color: #666; margin: 5px 0; }}
-                .contact {{ font-size: 0.9em; color: #888; }}
-                .section {{ margin-bottom: 25px; }}
-                .section-title {{ font-size: 1.1em; color: #333; margin-bottom: 10px; font-weight: 500; text-transform: uppercase; letter-spacing: 1px; }}
-                .skills {{ display: flex; flex-wrap: wrap; gap: 6px; }}
-                .skill {{ background: #f5f5f5; color: #333; padding: 4px 10px; border-radius: 3px; font-size: 0.8em; }}
-                .experience-item {{ margin-bottom: 15px; }}
-                .experience-description {{ margin-top: 5px; line-height: 1.4; color: #555; }}
-            </style>
-        </head>
-        <body>
-            <div class="resume">
-                <div class="header">
-                    <h1 class="name">{name}</h1>
-                    <p class="title">{title}</p>
-                    <p class="contact">{email} | {phone}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Summary</h2>
-                    <p>{summary}</p>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Skills</h2>
-                    <div class="skills">
-                        {''.join([f'<span class="skill">{escape_html(skill)}</span>' for skill in skills])}
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Experience</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{experience.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">Education</h2>
-                    <div class="experience-item">
-                        <div class="experience-description">{education.replace(chr(10), '<br>')}</div>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+    entries = []
+    record = {'index': index, 'template_id': template_id, 'files': []}
+    for output in formats:
+        if output in stored:
+            with open(artifact_store.path(stored[output]), 'rb') as f:
+                content = f.read()
+        elif output == 'html':
+            content = generate_resume_html(template_id, resume_data)
+        else:
+            content = render_pdf_bytes_when_free(resume_data)
+        if content is None:
+            record['error'] = f'{output.upper()} generation failed'
+            continue
+        name = f"{basename}.{output}"
+        # PDFs are already compressed
+        entries.append((name, content, output == 'html'))
+        record['files'].append(name)
+    return entries, record
+
+def render_pdf_bytes_when_free(resume_data):
+    """Render PDF bytes on the render pool, waiting (up to PDF_RENDER_TIMEOUT) while its queue is full"""
+    deadline = time.monotonic() + app.config['PDF_RENDER_TIMEOUT']
+    while True:
+        try:
+            return pdf_renderer.render_bytes(resume_data)
+        except RenderQueueFull:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
 
 @app.route('/download/<filename>')
 def download_file(filename):
-    generated_dir = '/tmp/generated_resumes' if os.getenv('VERCEL') else 'generated_resumes'
-    file_path = os.path.join(generated_dir, filename)
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True)
+    # Downloads count as accesses, so resumes still being fetched are evicted last
+    if artifact_store.touch(filename):
+        return send_file(artifact_store.path(filename), as_attachment=True)
     return jsonify({'error': 'File not found'}), 404
 
 @app.route('/compare', methods=['POST'])
@@ -656,5 +1244,59 @@ def compare_resumes():
         'improvement_percentage': round(improvement_percentage, 2)
     })
 
+def iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@app.cli.command('rescore')
+@click.argument('input_path', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_path', type=click.Path(dir_okay=False))
+@click.option('--chunk-size', default=5000, show_default=True, help='Resumes scored per batch')
+def rescore_command(input_path, output_path, chunk_size):
+    """Rescore a JSONL archive of {"id", "resume_text"} records with the current ATS rules"""
+    started = datetime.now()
+    total = 0
+    with open(input_path, 'r', encoding='utf-8') as source, open(output_path, 'w', encoding='utf-8') as target:
+        records = (json.loads(line) for line in source if line.strip())
+        for chunk in iter_chunks(records, chunk_size):
+            scores = ats_scorer.score_batch(record.get('resume_text', '') for record in chunk)
+            for record, score in zip(chunk, scores):
+                target.write(json.dumps({'id': record.get('id'), 'ats_score': score}) + '\n')
+            total += len(chunk)
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f"Rescored {total} resumes in {elapsed:.2f}s -> {output_path}")
+
+@app.cli.command('build-corpus')
+@click.argument('input_path', type=click.Path(exists=True, dir_okay=False))
+def build_corpus_command(input_path):
+    """Add a JSONL archive of {"id", "resume_text", "filename"} records to the ranking corpus"""
+    if corpus_store is None:
+        raise click.ClickException('Ranking is not available (needs NumPy and RANKING_CORPUS_DIR)')
+    started = datetime.now()
+    added = 0
+    with open(input_path, 'r', encoding='utf-8') as source:
+        for line in source:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            vector = job_matcher.vocabulary.vectorize(record.get('resume_text', ''))
+            if corpus_store.add(record.get('id'), record.get('filename'), vector):
+                added += 1
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f"Added {added} resumes to the ranking corpus in {elapsed:.2f}s ({len(corpus_store)} total)")
+
+@app.cli.command('bench-templates')
+@click.option('--iterations', default=1000, show_default=True, help='Renders per template')
+def bench_templates_command(iterations):
+    """Time resume HTML rendering for every registered template"""
+    for template_id, took_ms in resume_templates.benchmark(iterations).items():
+        click.echo(f"{template_id}: {took_ms:.4f} ms per render")
+
 if __name__ == '__main__':
     app.run(debug=True)
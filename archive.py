@@ -0,0 +1,53 @@
+"""
+Streaming ZIP archives
+
+iter_zip writes entries into a ZIP archive and yields the archive bytes
+after each entry, so a response can send a large archive while holding
+only one entry in memory. The archive never needs seeking: each entry's
+sizes and CRC follow its data, which zipfile does by itself when the
+output is not seekable.
+"""
+
+import io
+import time
+import zipfile
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects written bytes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(entries):
+    """Yield a ZIP archive of (name, data, compress) entries in chunks, one or more per entry
+
+    `data` is bytes or str; `compress` picks deflate over storing as is
+    (already compressed formats such as PDF gain little from deflate).
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for name, data, compress in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            archive.writestr(info, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # The central directory is written on close
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
@@ -0,0 +1,79 @@
+"""
+Content-addressed store for generated resume files
+
+Generated files are named by a hash of everything that determines their
+content (template, resume data), so a repeated /generate call finds its
+files by name instead of rendering them again, and two different requests
+can never overwrite each other. Files are written to a temporary name and
+renamed into place, so a reader never sees a half-written file.
+
+The files are tracked by a StorageManager, which keeps the HTML and PDF of
+one key together and deletes the least recently used keys beyond
+`max_entries` or `max_bytes`, and keys not requested for `ttl` seconds.
+"""
+
+import hashlib
+import json
+import os
+import re
+import uuid
+
+from storage import StorageManager
+
+
+def artifact_key(*parts):
+    """SHA-256 of the canonical JSON of `parts` (sorted keys, no whitespace)"""
+    canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ArtifactStore:
+    """Files named <prefix><key>.<extension> in one directory, with LRU/TTL quotas"""
+
+    def __init__(self, directory, max_entries=1000, prefix='resume_', max_bytes=0, ttl=0):
+        self.directory = directory
+        self.prefix = prefix
+        self._name_re = re.compile(rf'^{re.escape(prefix)}([0-9a-f]{{64}})\.(\w+)$')
+        self.storage = StorageManager(directory, max_bytes=max_bytes, max_entries=max_entries, ttl=ttl,
+                                      entry_key=self._entry_key)
+
+    def _entry_key(self, filename):
+        match = self._name_re.match(filename)
+        return match.group(1) if match else None
+
+    def filename(self, key, extension):
+        return f"{self.prefix}{key}.{extension}"
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def get(self, key):
+        """{extension: filename} of the files stored under `key`, or None if there are none"""
+        filenames = self.storage.get(key)
+        if filenames is None:
+            return None
+        return {self._name_re.match(filename).group(2): filename for filename in filenames}
+
+    def touch(self, filename):
+        """Mark a stored file as accessed; returns False if there is no such file"""
+        return self.storage.touch(filename)
+
+    def put(self, key, extension, write):
+        """Store a file by calling `write(path)` on a temporary path; returns its filename, or None if write failed"""
+        filename = self.filename(key, extension)
+        temp_path = self.path(f".{filename}.{uuid.uuid4().hex}.tmp")
+        try:
+            if write(temp_path) is False or not os.path.exists(temp_path):
+                return None
+            os.replace(temp_path, self.path(filename))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.storage.add(filename)
+        return filename
+
+    def sweep(self):
+        return self.storage.sweep()
+
+    def stats(self):
+        return self.storage.stats()
@@ -0,0 +1,236 @@
+"""
+Compiled ATS (Applicant Tracking System) scoring engine
+
+Keyword rules (section headers, action verbs, ...) are compiled into a
+single prefix-trie regex that is scanned once over the lowercased resume,
+so adding rules does not add passes over the text; rule sets too small to
+benefit fall back to plain substring checks. Contact details are pattern
+rules checked with one search each.
+
+Rules are plain dicts so they can be loaded from JSON (see load_rules).
+ATSScorer.score_batch scores many resumes at once from a feature matrix
+using NumPy when it is installed.
+"""
+
+import json
+import re
+
+# NumPy is optional; batch scoring falls back to scoring texts one by one
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_RULES = {
+    'max_score': 100,
+    'length': {'min_chars': 200, 'points': 20},
+    'patterns': {
+        'email': {'regex': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', 'points': 15},
+        'phone': {'regex': r'\(\d{3}\)\s*\d{3}-\d{4}|\d{3}-\d{3}-\d{4}', 'points': 15}
+    },
+    'keywords': {
+        # 'each' scores every matched term, 'any' scores once if at least one term matches
+        'sections': {
+            'terms': ['experience', 'education', 'skills', 'summary', 'objective'],
+            'points': 10,
+            'mode': 'each'
+        },
+        'action_verbs': {
+            'terms': ['developed', 'created', 'implemented', 'managed', 'led', 'designed', 'built'],
+            'points': 5,
+            'mode': 'any'
+        }
+    }
+}
+
+
+# Below this many keyword terms, plain substring checks are faster than the automaton
+COMPILED_MIN_TERMS = 32
+
+
+def _trie_pattern(terms):
+    """Build a prefix-factored alternation regex matching any of `terms`"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+def load_rules(path=None):
+    """Return the default rules, overridden section by section from a JSON file"""
+    rules = json.loads(json.dumps(DEFAULT_RULES))
+    if not path:
+        return rules
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading ATS rules from {path}: {e}")
+        return rules
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(rules.get(key), dict):
+            rules[key].update(value)
+        else:
+            rules[key] = value
+    return rules
+
+
+class ATSScorer:
+    """Scores resume text against a compiled rule set"""
+
+    def __init__(self, rules=None):
+        self.rules = rules or load_rules()
+        self.max_score = self.rules.get('max_score', 100)
+        self.length_rule = self.rules.get('length')
+        self.patterns = [
+            (name, re.compile(rule['regex']), rule['points'])
+            for name, rule in self.rules.get('patterns', {}).items()
+        ]
+        self.groups = [
+            (name, [term.lower() for term in group['terms']], group['points'], group.get('mode', 'each'))
+            for name, group in self.rules.get('keywords', {}).items()
+        ]
+        self._compile_keywords()
+
+    def _compile_keywords(self):
+        terms = sorted({term for _, group_terms, _, _ in self.groups for term in group_terms}, key=len, reverse=True)
+        self.terms = terms
+        self.term_count = len(terms)
+        self.keyword_regex = None
+        if len(terms) < COMPILED_MIN_TERMS:
+            # A handful of `term in text` scans beats any regex in CPython
+            return
+        # The alternation is factored into a prefix trie, so each position of the
+        # text costs one character test instead of one attempt per rule. The
+        # greedy trie returns the longest term at a position; shorter terms that
+        # are prefixes of it are implied, which reproduces `term in text` exactly.
+        self.keyword_regex = re.compile(_trie_pattern(terms))
+        self.implied = {term: [other for other in terms if term.startswith(other)] for term in terms}
+
+    def match_terms(self, lowered_text):
+        """Return the set of keyword terms present in already lowercased text"""
+        if self.keyword_regex is None:
+            return {term for term in self.terms if term in lowered_text}
+        found = set()
+        search = self.keyword_regex.search
+        match = search(lowered_text)
+        while match:
+            term = match.group()
+            if term not in found:
+                found.update(self.implied[term])
+                if len(found) == self.term_count:
+                    break
+            # Restart one character later so overlapping terms are not skipped
+            match = search(lowered_text, match.start() + 1)
+        return found
+
+    def score(self, resume_text, lowered_text=None, sections=None):
+        """Score resume text; returns {'score', 'max_score', 'breakdown'}
+
+        With `sections` from sections.SectionSegmenter, the result also lists
+        the detected sections with their offsets under 'sections'; rules
+        still match anywhere in the text, so scores do not change.
+        """
+        breakdown = []
+        total = 0
+
+        if self.length_rule:
+            matched = len(resume_text) > self.length_rule['min_chars']
+            points = self.length_rule['points'] if matched else 0
+            breakdown.append({'rule': 'length', 'matched': matched, 'points': points})
+            total += points
+
+        for name, regex, rule_points in self.patterns:
+            matched = regex.search(resume_text) is not None
+            points = rule_points if matched else 0
+            breakdown.append({'rule': name, 'matched': matched, 'points': points})
+            total += points
+
+        found = self.match_terms(lowered_text if lowered_text is not None else resume_text.lower())
+        for name, group_terms, rule_points, mode in self.groups:
+            hits = [term for term in group_terms if term in found]
+            if mode == 'any':
+                points = rule_points if hits else 0
+            else:
+                points = rule_points * len(hits)
+            breakdown.append({'rule': name, 'matched': hits, 'points': points})
+            total += points
+
+        result = {
+            'score': min(total, self.max_score),
+            'max_score': self.max_score,
+            'breakdown': breakdown
+        }
+        if sections is not None:
+            result['sections'] = [
+                {'name': section['name'], 'start': section['start'], 'end': section['end']} for section in sections
+            ]
+        return result
+
+    def feature_matrix(self, texts):
+        """Build a (len(texts), columns) 0/1 matrix: length, each pattern, then each term
+
+        Returns (matrix, columns).
+        """
+        columns = ['length'] + [name for name, _, _ in self.patterns] + [f"term:{term}" for term in self.terms]
+        term_columns = {term: index for index, term in enumerate(self.terms, start=1 + len(self.patterns))}
+        matrix = np.zeros((len(texts), len(columns)), dtype=np.int8)
+        min_chars = self.length_rule['min_chars'] if self.length_rule else None
+
+        for row, text in enumerate(texts):
+            if min_chars is not None and len(text) > min_chars:
+                matrix[row, 0] = 1
+            for column, (_, regex, _) in enumerate(self.patterns, start=1):
+                if regex.search(text):
+                    matrix[row, column] = 1
+            for term in self.match_terms(text.lower()):
+                matrix[row, term_columns[term]] = 1
+        return matrix, columns
+
+    def score_batch(self, texts):
+        """Score many resumes at once; returns the same values as score(text)['score']"""
+        texts = list(texts)
+        if not NUMPY_AVAILABLE:
+            return [self.score(text)['score'] for text in texts]
+        if not texts:
+            return []
+
+        matrix, _ = self.feature_matrix(texts)
+        pattern_end = 1 + len(self.patterns)
+        scores = np.zeros(len(texts), dtype=np.float64)
+
+        if self.length_rule:
+            scores += matrix[:, 0].astype(np.float64) * self.length_rule['points']
+        if self.patterns:
+            pattern_points = np.array([points for _, _, points in self.patterns], dtype=np.float64)
+            scores += matrix[:, 1:pattern_end].astype(np.float64) @ pattern_points
+
+        if self.groups:
+            # membership[t, g] counts how often term t is listed in group g
+            term_index = {term: index for index, term in enumerate(self.terms)}
+            membership = np.zeros((len(self.terms), len(self.groups)), dtype=np.float64)
+            for group, (_, group_terms, _, _) in enumerate(self.groups):
+                for term in group_terms:
+                    membership[term_index[term], group] += 1
+            group_hits = matrix[:, pattern_end:].astype(np.float64) @ membership
+            any_mode = np.array([mode == 'any' for _, _, _, mode in self.groups])
+            group_hits[:, any_mode] = group_hits[:, any_mode] > 0
+            group_points = np.array([points for _, _, points, _ in self.groups], dtype=np.float64)
+            scores += group_hits @ group_points
+
+        # Integral scores come back as ints, like score()
+        return [int(value) if value.is_integer() else value for value in np.minimum(scores, self.max_score).tolist()]
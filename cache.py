@@ -0,0 +1,445 @@
+"""
+Caching helpers shared by the analysis and generation endpoints
+
+LRUCache is a bounded in-process tier, DiskCache stores JSON entries in a
+directory shared by every worker on the node, SQLiteCache does the same in
+a single database file, and TieredCache puts a memory tier in front of a
+shared one with hit/miss counters. Entries can expire after a TTL.
+
+SingleFlight makes concurrent callers of the same key share one call.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalescing stays within one process
+    fcntl = None
+
+
+class LRUCache:
+    """Thread-safe least-recently-used mapping with a fixed number of entries and optional TTL"""
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, expires = self._data[key]
+            if expires is not None and expires <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class DiskCache:
+    """JSON entries in a directory, evicting least recently used files above max_bytes
+
+    The directory size is counted once and then kept up to date on each write,
+    so the directory is only scanned when it goes over max_bytes, or every
+    `rescan_writes` writes to pick up entries written by other workers.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, rescan_writes=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_writes = rescan_writes
+        self._bytes = None  # unknown until the first scan
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)  # mtime doubles as last access time for eviction
+            return value
+        except (OSError, ValueError):
+            return default
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._writes += 1
+            if self._bytes is not None:
+                self._bytes += size - replaced
+            scan = (self._bytes is None or self._bytes > self.max_bytes
+                    or (self.rescan_writes and self._writes % self.rescan_writes == 0))
+        if scan:
+            self.evict()
+
+    def evict(self):
+        """Delete the oldest entries until the directory fits in max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                    except OSError:
+                        pass
+            self._bytes = total
+
+    def stats(self):
+        if self._bytes is None:
+            self.evict()
+        with self._lock:
+            return {'directory': self.directory, 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+class SQLiteCache:
+    """JSON entries in one SQLite file shared by all workers, with TTL and LRU trimming"""
+
+    def __init__(self, path, max_entries=10000, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, accessed REAL NOT NULL)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def get(self, key, default=None):
+        now = time.time()
+        try:
+            with self._connection() as db:
+                row = db.execute(
+                    'SELECT value FROM entries WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, now)
+                ).fetchone()
+                if row is None:
+                    return default
+                db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error reading cache entry: {e}")
+            return default
+
+    def set(self, key, value):
+        now = time.time()
+        try:
+            with self._connection() as db:
+                db.execute(
+                    'INSERT OR REPLACE INTO entries (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(value), now + self.ttl if self.ttl else None, now)
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Error writing cache entry: {e}")
+            return
+        self._writes += 1
+        # Trimming scans the table, so it runs every few writes rather than on each one
+        if self._writes % 64 == 1:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries"""
+        try:
+            with self._connection() as db:
+                db.execute('DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+                if self.max_entries:
+                    db.execute(
+                        'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                        (self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            print(f"Error trimming cache: {e}")
+
+    def __len__(self):
+        with self._connection() as db:
+            return db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def stats(self):
+        try:
+            entries = len(self)
+        except sqlite3.Error as e:
+            print(f"Error counting cache entries: {e}")
+            entries = None
+        return {'path': self.path, 'entries': entries, 'max_entries': self.max_entries}
+
+
+class TieredCache:
+    """In-process LRU in front of an optional shared tier, with hit/miss counters
+
+    The shared tier is a DiskCache in `directory`, or any object with
+    get/set passed as `disk` (e.g. a SQLiteCache). Hits are counted per tier.
+    """
+
+    def __init__(self, maxsize=256, directory=None, max_bytes=256 * 1024 * 1024, ttl=None, disk=None):
+        self.memory = LRUCache(maxsize, ttl=ttl)
+        self.disk = disk if disk is not None else (DiskCache(directory, max_bytes) if directory else None)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self.memory.get(key)
+        from_disk = False
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                from_disk = True
+                self.memory.set(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += from_disk
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'memory_hits': self.hits - self.disk_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self.memory),
+                'max_entries': self.memory.maxsize
+            }
+        if self.disk is not None and hasattr(self.disk, 'stats'):
+            stats['disk'] = self.disk.stats()
+        return stats
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers wait for its result
+
+    Within a process, followers wait on the leader thread. With `lock_dir`,
+    leaders in different workers also serialize on a lock file, so the
+    function should check a shared cache first: a worker that waited on the
+    lock then finds the other worker's result there. Keys are hashed onto
+    `lock_stripes` lock files, so the directory never grows; keys sharing a
+    stripe just take turns.
+    """
+
+    def __init__(self, lock_dir=None, lock_timeout=30, lock_stripes=256):
+        self.lock_dir = lock_dir if fcntl else None
+        self.lock_timeout = lock_timeout
+        self.lock_stripes = max(1, lock_stripes)
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def _lock_path(self, key):
+        stripe = int(hashlib.sha256(str(key).encode('utf-8')).hexdigest()[:8], 16) % self.lock_stripes
+        return os.path.join(self.lock_dir, f"stripe-{stripe}.lock")
+
+    @contextmanager
+    def _worker_lock(self, key):
+        if not self.lock_dir:
+            yield
+            return
+        with open(self._lock_path(key), 'a') as lock_file:
+            deadline = time.time() + self.lock_timeout
+            locked = False
+            while not locked:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                except OSError:
+                    # A stuck holder must not block us forever; go ahead without the lock
+                    if time.time() >= deadline:
+                        break
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _try_worker_lock(self, key):
+        """The key's lock file, locked, or None if another worker holds it"""
+        lock_file = open(self._lock_path(key), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    @staticmethod
+    def _unlock(lock_file):
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+
+    def do_async(self, key, start, fallback=None):
+        """Non-blocking do(): returns the Future in flight for `key`, or the new one `start()` returns
+
+        With `lock_dir`, `start()` runs holding the key's worker lock, which
+        is released when its Future completes; like do()'s function, it
+        should check the shared cache first. If another worker holds the
+        lock, `fallback()` supplies the Future instead: it should wait for
+        that worker off this thread, e.g. by running a function that goes
+        through do().
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            self.calls += 1
+            lock_file = self._try_worker_lock(key) if self.lock_dir else None
+            if self.lock_dir and lock_file is None and fallback is not None:
+                future = fallback()
+            else:
+                try:
+                    future = start()
+                except BaseException:
+                    if lock_file is not None:
+                        self._unlock(lock_file)
+                    raise
+                if lock_file is not None:
+                    future.add_done_callback(lambda done: self._unlock(lock_file))
+            self._futures[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def do(self, key, fn):
+        """Return fn() for the first caller of `key`; callers arriving meanwhile get the same result"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            with self._worker_lock(key):
+                flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._flights)}
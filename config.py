@@ -15,27 +15,31 @@ class Config:
     # Allowed file extensions
     ALLOWED_EXTENSIONS = {'pdf'}
     
-    # Resume templates configuration
+    # Resume templates: each ID renders templates/resumes/<id>.html unless a 'template' file is given
     RESUME_TEMPLATES = {
         'modern': {
             'name': 'Modern Professional',
             'description': 'Clean and contemporary design perfect for tech roles',
-            'color_scheme': 'blue'
+            'color_scheme': 'blue',
+            'preview': '/static/images/template1-preview.png'
         },
         'classic': {
             'name': 'Classic Executive',
             'description': 'Traditional format ideal for corporate positions',
-            'color_scheme': 'black'
+            'color_scheme': 'black',
+            'preview': '/static/images/template2-preview.png'
         },
         'creative': {
             'name': 'Creative Portfolio',
             'description': 'Eye-catching design for creative professionals',
-            'color_scheme': 'gradient'
+            'color_scheme': 'gradient',
+            'preview': '/static/images/template3-preview.png'
         },
         'minimal': {
             'name': 'Minimal Tech',
             'description': 'Minimalist design focused on technical skills',
-            'color_scheme': 'gray'
+            'color_scheme': 'gray',
+            'preview': '/static/images/template4-preview.png'
         }
     }
 
@@ -0,0 +1,256 @@
+"""
+PDF text extraction engine
+
+Large documents are split into page ranges that run on a reusable process
+pool. Every page gets its own time limit inside the worker and the whole
+document has a deadline, so a pathological PDF returns partial text
+instead of holding the request worker.
+"""
+
+import io
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import PyPDF2
+
+# SIGALRM based page limits only exist on Unix
+CAN_LIMIT_PAGES = hasattr(signal, 'setitimer')
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+class PageTimeout(Exception):
+    """Raised inside a worker when a single page runs over its time limit"""
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeout()
+
+
+@contextmanager
+def _time_limit(seconds):
+    """Interrupt the enclosed block after `seconds` (worker main thread only)"""
+    if not seconds or not CAN_LIMIT_PAGES or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_page_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _page_limit(page_timeout, deadline):
+    """Seconds one page may run: the page timeout, cut short by the document deadline"""
+    if not deadline:
+        return page_timeout
+    remaining = max(deadline - time.time(), 1e-3)
+    return min(page_timeout, remaining) if page_timeout else remaining
+
+
+def _extract_page_range(pdf_bytes, start, stop, page_timeout, deadline):
+    """Worker task: extract pages [start, stop) and return (start, texts)
+
+    A page that fails, runs over `page_timeout` or runs past the document
+    deadline yields None. Pages after the deadline are not attempted, so the
+    list may be short.
+    """
+    texts = []
+    try:
+        with _time_limit(_page_limit(page_timeout, deadline)):
+            reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    except Exception:
+        return start, texts
+
+    for page_number in range(start, stop):
+        if deadline and time.time() >= deadline:
+            break
+        try:
+            with _time_limit(_page_limit(page_timeout, deadline)):
+                texts.append(reader.pages[page_number].extract_text())
+        except Exception:
+            texts.append(None)
+    return start, texts
+
+
+def _count_pages(pdf_bytes, page_timeout, deadline):
+    """Worker task: the document's page count, or None when parsing the page tree runs over the limit"""
+    try:
+        with _time_limit(_page_limit(page_timeout, deadline)):
+            return len(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except PageTimeout:
+        return None
+
+
+def get_pool(workers):
+    """Return the shared extraction pool, creating it on first use"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _page_ranges(start, stop, chunks):
+    """Split pages [start, stop) into at most `chunks` contiguous ranges"""
+    size = -(-(stop - start) // chunks)
+    return [(first, min(first + size, stop)) for first in range(start, stop, size)]
+
+
+def _iter_inline(pdf_bytes, start, stop, page_timeout, deadline):
+    """Yield single-page waves extracted in the calling thread with one reader
+
+    Page limits only interrupt a page in progress on the main thread; other
+    threads only check the deadline between pages.
+    """
+    try:
+        with _time_limit(_page_limit(page_timeout, deadline)):
+            reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    except PageTimeout:
+        return
+    for page_number in range(start, stop):
+        if deadline and time.time() >= deadline:
+            return
+        try:
+            with _time_limit(_page_limit(page_timeout, deadline)):
+                text = reader.pages[page_number].extract_text()
+        except Exception:
+            text = None
+        yield [text]
+
+
+def _iter_parallel(pdf_bytes, start, stop, workers, page_timeout, deadline, wave=None, chunks=None):
+    """Yield waves of pages extracted on the process pool
+
+    Without `wave` every page is one wave split into workers * 2 ranges. With
+    it, the first wave has `wave` pages, each later wave is twice as large and
+    every wave is one contiguous range per worker: a budget met on the first
+    pages stops work early, while a document that never meets it still costs
+    only a few parses per worker. `chunks` overrides the number of ranges.
+    """
+    pool = get_pool(workers)
+    wave_start = start
+    while wave_start < stop:
+        wave_stop = min(wave_start + wave, stop) if wave else stop
+        futures = [
+            pool.submit(_extract_page_range, pdf_bytes, first, last, page_timeout, deadline)
+            for first, last in _page_ranges(wave_start, wave_stop, chunks or (workers if wave else workers * 2))
+        ]
+        remaining = deadline - time.time() if deadline else None
+        done, not_done = wait(futures, timeout=max(remaining, 0) if remaining is not None else None)
+        for future in not_done:
+            future.cancel()
+
+        texts = [None] * (wave_stop - wave_start)
+        for future in done:
+            first, range_texts = future.result()
+            offset = first - wave_start
+            texts[offset:offset + len(range_texts)] = range_texts
+        yield texts
+        if deadline and time.time() >= deadline:
+            return
+        wave_start = wave_stop
+        wave = wave * 2 if wave else None
+
+
+def _page_count(pdf_bytes, workers, page_timeout, deadline):
+    """Count pages on the pool (inline without workers) within the limits; None when that times out"""
+    if workers:
+        try:
+            future = get_pool(workers).submit(_count_pages, pdf_bytes, page_timeout, deadline)
+            remaining = deadline - time.time() if deadline else None
+            done, _ = wait([future], timeout=max(remaining, 0) if remaining is not None else None)
+            if not done:
+                future.cancel()
+                return None
+            return future.result()
+        except (BrokenProcessPool, OSError) as e:
+            print(f"PDF extraction pool unavailable, extracting inline: {e}")
+            _discard_pool()
+    return _count_pages(pdf_bytes, page_timeout, deadline)
+
+
+def _collect(pages_iter, max_chars):
+    """Consume page waves until the character budget is met; returns (pages, budget_met)"""
+    pages = []
+    chars = 0
+    for texts in pages_iter:
+        pages.extend(texts)
+        chars += sum(len(text) for text in texts if text)
+        if max_chars and chars >= max_chars:
+            return pages, True
+    return pages, False
+
+
+def extract_pdf_text(pdf_bytes, workers=0, page_timeout=None, doc_timeout=None, min_parallel_pages=4,
+                     max_chars=None, max_pages=None, start_page=0):
+    """Extract text from raw PDF bytes
+
+    Documents with at least `min_parallel_pages` pages are spread across a
+    pool of `workers` processes; smaller ones are one task on the pool. With
+    workers=0 pages are extracted in the calling thread, where the page limit
+    (cut short by the document deadline) needs the main thread on Unix.
+
+    `max_chars` and `max_pages` set a budget: decoding stops once it is met
+    and `next_page` tells the caller where to resume (see `start_page`).
+
+    Returns a dict with the joined `text`, `page_count`, `pages_extracted`,
+    `next_page` (None when the document was read to the end) and a
+    `truncated` flag set when any page was skipped or timed out. When even
+    counting the pages times out, `page_count` is None and no text is
+    returned.
+    """
+    deadline = time.time() + doc_timeout if doc_timeout else None
+    # A huge or malformed page tree must not hold the caller either
+    page_count = _page_count(pdf_bytes, workers, page_timeout, deadline)
+    if page_count is None:
+        return {'text': '', 'page_count': None, 'pages_extracted': 0, 'next_page': None, 'truncated': True}
+    stop = min(page_count, start_page + max_pages) if max_pages else page_count
+
+    # With a character budget, pages are decoded in waves so work stops soon after it is met.
+    # Small documents still go to the pool, as one task, so the page limits and deadline hold
+    if not workers:
+        pages_iter = _iter_inline(pdf_bytes, start_page, stop, page_timeout, deadline)
+    elif stop - start_page >= min_parallel_pages:
+        pages_iter = _iter_parallel(pdf_bytes, start_page, stop, workers, page_timeout, deadline,
+                                    wave=workers if max_chars else None)
+    else:
+        pages_iter = _iter_parallel(pdf_bytes, start_page, stop, workers, page_timeout, deadline, chunks=1)
+
+    try:
+        pages, budget_met = _collect(pages_iter, max_chars)
+    except (BrokenProcessPool, OSError) as e:
+        # Environments without working multiprocessing fall back to inline extraction
+        print(f"PDF extraction pool unavailable, extracting inline: {e}")
+        _discard_pool()
+        pages, budget_met = _collect(_iter_inline(pdf_bytes, start_page, stop, page_timeout, deadline), max_chars)
+
+    position = start_page + len(pages)
+    stopped_by_budget = budget_met or position == stop
+    page_texts = [text for text in pages if text is not None]
+    return {
+        'text': "\n".join(page_texts).strip(),
+        'page_count': page_count,
+        'pages_extracted': len(page_texts),
+        'next_page': position if stopped_by_budget and position < page_count else None,
+        'truncated': len(page_texts) < len(pages) or not stopped_by_budget
+    }
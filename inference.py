@@ -0,0 +1,420 @@
+"""
+Hugging Face inference client
+
+One pooled requests.Session keeps TLS connections to the inference API
+alive between calls, and the prompts of one analysis are sent
+concurrently, so an analysis takes about as long as its slowest prompt.
+Every call has a timeout; a failed or slow prompt yields None.
+
+Successful responses can be cached (see cache.TieredCache) under a hash of
+the model, prompt and generation parameters, and identical requests in
+flight at the same time are sent once (see cache.SingleFlight).
+
+With max_batch_size > 1, prompts for the same model and parameters from
+concurrent callers are collected by a MicroBatcher and sent as one request
+with a list of inputs. iter_many() then waits on the batcher's futures
+directly, so queued prompts do not each hold a thread.
+
+An optional TokenBucket and CircuitBreaker (see resilience.py) guard every
+request, and callers can pass a deadline that bounds the whole call.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_BASE = 'https://api-inference.huggingface.co/models'
+DEFAULT_MODEL = 'microsoft/DialoGPT-medium'
+DEFAULT_PARAMETERS = {
+    "max_length": 1000,
+    "temperature": 0.7,
+    "return_full_text": False
+}
+
+
+def generated_text(response):
+    """Pull the generated text out of an inference response, if there is one"""
+    if isinstance(response, list) and response and isinstance(response[0], dict):
+        return response[0].get('generated_text')
+    if isinstance(response, dict):
+        return response.get('generated_text')
+    return None
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header given in seconds; HTTP dates are ignored"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class MicroBatcher:
+    """Groups prompts per (model, parameters) and flushes them as one batch
+
+    A group is flushed when it holds prompts from max_batch_size callers or
+    its oldest prompt has waited max_wait_ms. A batch never carries two
+    prompts with the same `caller` tag, so the prompts of one analysis go
+    out in parallel batches alongside other analyses' prompts instead of
+    waiting on each other. `send_batch(model, parameters, prompts)` runs on
+    a small pool and returns one response (or None) per prompt.
+    """
+
+    def __init__(self, send_batch, max_batch_size=8, max_wait_ms=10, max_concurrency=5):
+        self.send_batch = send_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.prompts = 0
+        self._groups = {}
+        self._condition = threading.Condition()
+        self._senders = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix='inference-batch')
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, model, prompt, parameters, caller=None):
+        """Queue a prompt; returns a Future resolving to its response
+
+        Prompts submitted with the same `caller` are never put in one batch.
+        """
+        future = Future()
+        key = (model, json.dumps(parameters, sort_keys=True))
+        with self._condition:
+            group = self._groups.setdefault(key, {'started': time.monotonic(), 'items': []})
+            group['items'].append((prompt, future, future if caller is None else caller))
+            self._condition.notify()
+        return future
+
+    def _due(self, now):
+        return [
+            key for key, group in self._groups.items()
+            if len({caller for _, _, caller in group['items']}) >= self.max_batch_size
+            or now - group['started'] >= self.max_wait
+        ]
+
+    def _split(self, items):
+        """Cut a group into batches of at most max_batch_size prompts, one per caller"""
+        batches = []
+        for item in items:
+            for batch in batches:
+                if len(batch) < self.max_batch_size and all(item[2] is not other[2] for other in batch):
+                    batch.append(item)
+                    break
+            else:
+                batches.append([item])
+        return batches
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = time.monotonic()
+                    due = self._due(now)
+                    if due:
+                        break
+                    oldest = min((group['started'] for group in self._groups.values()), default=None)
+                    self._condition.wait(None if oldest is None else oldest + self.max_wait - now)
+                if self._closed:
+                    return
+                batches = []
+                for key in due:
+                    batches.extend((key, items) for items in self._split(self._groups.pop(key)['items']))
+            for key, items in batches:
+                self._senders.submit(self._flush, key, items)
+
+    def _flush(self, key, items):
+        model, parameters = key[0], json.loads(key[1])
+        try:
+            responses = self.send_batch(model, parameters, [prompt for prompt, _, _ in items])
+        except Exception as e:
+            print(f"Error sending inference batch: {e}")
+            responses = None
+        if not isinstance(responses, list) or len(responses) != len(items):
+            responses = [None] * len(items)
+        with self._condition:
+            self.batches += 1
+            self.prompts += len(items)
+        for (_, future, _), response in zip(items, responses):
+            if not future.done():
+                future.set_result(response)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'batches': self.batches,
+                'prompts': self.prompts,
+                'average_batch_size': round(self.prompts / self.batches, 2) if self.batches else 0.0,
+                'queued': sum(len(group['items']) for group in self._groups.values())
+            }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            pending = [future for group in self._groups.values() for _, future, _ in group['items']]
+            self._groups.clear()
+            self._condition.notify()
+        for future in pending:
+            if not future.done():
+                future.set_result(None)
+        self._senders.shutdown(wait=False, cancel_futures=True)
+
+
+class InferenceClient:
+    """Connection-pooled client that can run several prompts at once"""
+
+    def __init__(self, api_key=None, api_base=DEFAULT_API_BASE, model=DEFAULT_MODEL, timeout=10, max_concurrency=5,
+                 cache=None, single_flight=None, max_batch_size=1, max_batch_wait_ms=10, limiter=None, breaker=None):
+        self.api_base = api_base.rstrip('/')
+        self.limiter = limiter
+        self.breaker = breaker
+        self.cache = cache
+        self.single_flight = single_flight
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if api_key:
+            self.session.headers['Authorization'] = f"Bearer {api_key}"
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.batcher = None
+        if max_batch_size > 1:
+            self.batcher = MicroBatcher(self._post_batch, max_batch_size, max_batch_wait_ms, self.max_concurrency)
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='inference')
+            return self._executor
+
+    @staticmethod
+    def cache_key(model, prompt, parameters):
+        key = json.dumps([model, prompt, parameters], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def available(self):
+        """False while the circuit breaker is open"""
+        return self.breaker is None or self.breaker.available()
+
+    def _remaining(self, deadline):
+        """Seconds a call may take: the timeout, cut short by the deadline (time.monotonic based)"""
+        if deadline is None:
+            return self.timeout
+        remaining = max(deadline - time.monotonic(), 0)
+        return min(self.timeout, remaining) if self.timeout else remaining
+
+    def query(self, prompt, model=None, parameters=None, deadline=None):
+        """Send one prompt; returns the decoded JSON response or None"""
+        model = model or self.model
+        parameters = parameters or DEFAULT_PARAMETERS
+        key = self.cache_key(model, prompt, parameters)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        def fetch():
+            # Another worker may have stored the response while we waited for its lock
+            if self.cache is not None and self.single_flight is not None and self.single_flight.lock_dir:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+            if self.batcher is not None:
+                wait_for = self._remaining(deadline)
+                try:
+                    result = self.batcher.submit(model, prompt, parameters).result(
+                        timeout=wait_for + self.batcher.max_wait + 1 if wait_for else None
+                    )
+                except Exception:
+                    result = None
+            else:
+                result = self._post(model, {"inputs": prompt, "parameters": parameters}, deadline)
+            # Failures are not cached so the next call retries
+            if self.cache is not None and result is not None:
+                self.cache.set(key, result)
+            return result
+
+        if self.single_flight is None:
+            return fetch()
+        return self.single_flight.do(key, fetch)
+
+    def submit(self, prompt, model=None, parameters=None, deadline=None, caller=None):
+        """Queue one prompt without holding a thread while it waits; returns a Future of the response or None
+
+        With batching the prompt goes straight to the batcher, and identical
+        prompts in flight in this process share one Future. With a
+        single-flight lock dir, the batcher is only used while holding the
+        prompt's worker lock; if another worker holds it, query() waits for
+        that worker's response on the client's thread pool. Without batching
+        it always runs query() there.
+        """
+        if self.batcher is None:
+            return self._get_executor().submit(self.query, prompt, model, parameters, deadline)
+        model = model or self.model
+        parameters = parameters or DEFAULT_PARAMETERS
+        key = self.cache_key(model, prompt, parameters)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        def start():
+            # Another worker may have stored the response before we got its lock
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            future = self.batcher.submit(model, prompt, parameters, caller)
+            if self.cache is not None:
+                future.add_done_callback(lambda done: self._store(key, done))
+            return future
+
+        def wait_for_other_worker():
+            return self._get_executor().submit(self.query, prompt, model, parameters, deadline)
+
+        if self.single_flight is None:
+            return start()
+        return self.single_flight.do_async(key, start, wait_for_other_worker)
+
+    def _cached(self, key):
+        """A completed Future of the cached response for `key`, or None"""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        future = Future()
+        future.set_result(cached)
+        return future
+
+    def _store(self, key, future):
+        # Failures are not cached so the next call retries
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self.cache.set(key, future.result())
+
+    def _post(self, model, payload, deadline=None):
+        # An open circuit fails fast, before waiting for a rate limit token
+        if not self.available():
+            return None
+        timeout = self._remaining(deadline)
+        if deadline is not None and timeout <= 0:
+            return None
+        if self.limiter is not None and not self.limiter.acquire(timeout=timeout):
+            print("Inference rate limit: no request slot before the deadline")
+            return None
+        if self.breaker is not None and not self.breaker.allow():
+            return None
+        timeout = self._remaining(deadline)
+
+        try:
+            response = self.session.post(f"{self.api_base}/{model}", json=payload, timeout=timeout or None)
+        except Exception as e:
+            print(f"Error querying Hugging Face API: {e}")
+            self._record(failure=True)
+            return None
+
+        if response.status_code == 200:
+            try:
+                result = response.json()
+            except ValueError as e:
+                print(f"Invalid response from Hugging Face API: {e}")
+                self._record(failure=True)
+                return None
+            self._record()
+            if self.limiter is not None:
+                self.limiter.reward()
+            return result
+
+        print(f"API Error: {response.status_code} - {response.text}")
+        if response.status_code in (429, 503) and self.limiter is not None:
+            self.limiter.penalize(retry_after_seconds(response.headers.get('Retry-After')))
+        # 429 is our own pacing problem; server errors count against the backend's health
+        self._record(failure=response.status_code >= 500)
+        return None
+
+    def _record(self, failure=False):
+        if self.breaker is None:
+            return
+        if failure:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _post_batch(self, model, parameters, prompts):
+        """Send several prompts as one list input; returns one response per prompt"""
+        if len(prompts) == 1:
+            return [self._post(model, {"inputs": prompts[0], "parameters": parameters})]
+        response = self._post(model, {"inputs": prompts, "parameters": parameters})
+        if not isinstance(response, list) or len(response) != len(prompts):
+            return [None] * len(prompts)
+        # Each item has the shape of a single-prompt response
+        return [item if isinstance(item, list) else [item] for item in response]
+
+    def stats(self):
+        return {
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'single_flight': self.single_flight.stats() if self.single_flight is not None else None,
+            'batching': self.batcher.stats() if self.batcher is not None else None,
+            'rate_limiter': self.limiter.state() if self.limiter is not None else None,
+            'circuit_breaker': self.breaker.state() if self.breaker is not None else None
+        }
+
+    def iter_many(self, prompts, model=None, deadline=None):
+        """Send a {name: prompt} dict concurrently, yielding (name, response or None) as each completes
+
+        Waits at most one timeout (plus a small margin), or until `deadline`,
+        for the whole set; prompts still running then are yielded with None.
+        """
+        caller = object()
+        names = {}
+        for name, prompt in prompts.items():
+            # Identical prompts can share one Future
+            names.setdefault(self.submit(prompt, model, None, deadline, caller), []).append(name)
+        if deadline is not None:
+            wait_for = max(deadline - time.monotonic(), 0)
+        else:
+            wait_for = self.timeout + 1 if self.timeout else None
+            if self.batcher is not None and wait_for:
+                wait_for += self.batcher.max_wait
+        pending = set(names)
+        try:
+            for future in as_completed(names, timeout=wait_for):
+                pending.discard(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    print(f"Error querying inference prompt: {e}")
+                    response = None
+                for name in names[future]:
+                    yield name, response
+        except FuturesTimeout:
+            for future in pending:
+                # Batched futures may be shared with other callers; only pool tasks are cancelled
+                if self.batcher is None:
+                    future.cancel()
+                for name in names[future]:
+                    print(f"Inference prompt '{name}' did not finish in time")
+                    yield name, None
+
+    def query_many(self, prompts, model=None, deadline=None):
+        """Send a {name: prompt} dict concurrently; returns {name: response or None}"""
+        results = dict.fromkeys(prompts)
+        results.update(self.iter_many(prompts, model, deadline))
+        return results
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        if self.batcher is not None:
+            self.batcher.close()
+        self.session.close()
@@ -0,0 +1,96 @@
+"""
+Local stub of the Hugging Face inference API
+
+Answers POST /<model> with [{"generated_text": ...}] after an optional
+delay, so the inference client can be exercised without network access.
+A list of inputs gets one such list per input, like the hosted API.
+Setting `server.fail_status` (and `server.retry_after`) makes every call
+fail with that status instead, and `server.invalid_body` makes it answer
+200 with a body that is not JSON.
+Run it with `python inference_stub.py [port] [delay]` and point
+HF_API_BASE at http://127.0.0.1:<port>.
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            payload = {}
+        self.server.requests_seen += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.fail_status:
+            body = json.dumps({'error': 'stub failure'}).encode('utf-8')
+            self.send_response(self.server.fail_status)
+            if self.server.retry_after is not None:
+                self.send_header('Retry-After', str(self.server.retry_after))
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.server.invalid_body:
+            body = b'<html>upstream error</html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        inputs = payload.get('inputs', '')
+        if isinstance(inputs, list):
+            self.server.batch_sizes.append(len(inputs))
+            result = [[{'generated_text': f"stub response to: {str(prompt)[:60]}"}] for prompt in inputs]
+        else:
+            result = [{'generated_text': f"stub response to: {str(inputs)[:60]}"}]
+        body = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, delay=0.0):
+    """Start the stub in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.requests_seen = 0
+    server.batch_sizes = []
+    server.fail_status = None
+    server.retry_after = None
+    server.invalid_body = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8089
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.delay = delay
+    server.requests_seen = 0
+    server.batch_sizes = []
+    server.fail_status = None
+    server.retry_after = None
+    server.invalid_body = False
+    print(f"Stub inference server on http://127.0.0.1:{port} (delay {delay}s)")
+    server.serve_forever()
@@ -0,0 +1,132 @@
+"""
+Job description matching engine
+
+Resumes and job descriptions are turned into sparse TF-IDF vectors over a
+precomputed vocabulary (data/vocabulary.json), so matching works offline
+and costs a couple of sparse dot products. Job-side vectors are cached,
+because the same opening is matched against many resumes.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+
+from cache import LRUCache
+
+DEFAULT_VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'vocabulary.json')
+
+# Keeps c++, c#, node.js and ci/cd together; trailing punctuation is dropped
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]')
+
+
+def tokenize(text):
+    """Lowercase word tokens, keeping compound tokens like c++ or ci/cd whole"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class Vocabulary:
+    """Term list with labels and IDF weights, plus job-title profiles"""
+
+    def __init__(self, path=DEFAULT_VOCABULARY_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Keys go through the tokenizer so they line up with tokenized text
+        entries = sorted((' '.join(tokenize(term)), info) for term, info in data['terms'].items() if tokenize(term))
+        self.terms = [term for term, _ in entries]
+        self.index = {term: position for position, term in enumerate(self.terms)}
+        self.labels = [info['label'] for _, info in entries]
+        self.idf = [info['idf'] for _, info in entries]
+        self.profiles = {title.lower(): text for title, text in data.get('profiles', {}).items()}
+        self.max_words = max(len(term.split()) for term in self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def term_counts(self, text):
+        """Count vocabulary terms (up to max_words words long) in text
+
+        Parts of compound tokens also count on their own, so python/django
+        matches both python and django.
+        """
+        tokens = tokenize(text)
+        index = self.index
+        counts = {}
+        for start, token in enumerate(tokens):
+            for length in range(1, min(self.max_words, len(tokens) - start) + 1):
+                term_id = index.get(' '.join(tokens[start:start + length]))
+                if term_id is not None:
+                    counts[term_id] = counts.get(term_id, 0) + 1
+            if '/' in token or '-' in token:
+                for part in re.split(r'[/-]', token):
+                    term_id = index.get(part)
+                    if term_id is not None and part != token:
+                        counts[term_id] = counts.get(term_id, 0) + 1
+        return counts
+
+    def vectorize(self, text):
+        """Sparse L2-normalized TF-IDF vector as {term_id: weight}"""
+        weights = {
+            term_id: (1 + math.log(count)) * self.idf[term_id]
+            for term_id, count in self.term_counts(text).items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        if not norm:
+            return {}
+        return {term_id: weight / norm for term_id, weight in weights.items()}
+
+
+def dot(left, right):
+    """Sparse dot product, iterating over the smaller vector"""
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(weight * right.get(term_id, 0.0) for term_id, weight in left.items())
+
+
+class JobMatcher:
+    """Scores resumes against job descriptions with cached job vectors"""
+
+    def __init__(self, vocabulary=None, cache_size=512):
+        self.vocabulary = vocabulary or Vocabulary()
+        self.job_vectors = LRUCache(cache_size)
+
+    def job_text(self, target_job, job_description=None):
+        """The text a job is matched on: its description, else a known title profile, else the title"""
+        if job_description:
+            return job_description
+        title = (target_job or '').strip()
+        profile = self.vocabulary.profiles.get(title.lower())
+        return f"{title} {profile}" if profile else title
+
+    def job_vector(self, job_text):
+        key = hashlib.sha256(job_text.encode('utf-8')).hexdigest()
+        vector = self.job_vectors.get(key)
+        if vector is None:
+            vector = self.vocabulary.vectorize(job_text)
+            self.job_vectors.set(key, vector)
+        return vector
+
+    def match(self, resume_text, target_job=None, job_description=None, resume_vector=None, max_missing=10):
+        """Match a resume against a job
+
+        match_percentage is the share of the job's term weight the resume
+        covers; similarity is the cosine of the two TF-IDF vectors.
+        """
+        job_vector = self.job_vector(self.job_text(target_job, job_description))
+        if resume_vector is None:
+            resume_vector = self.vocabulary.vectorize(resume_text)
+
+        job_weight = sum(job_vector.values())
+        covered = sum(weight for term_id, weight in job_vector.items() if term_id in resume_vector)
+        missing = sorted(
+            (term_id for term_id in job_vector if term_id not in resume_vector),
+            key=lambda term_id: (-job_vector[term_id], self.vocabulary.terms[term_id])
+        )
+
+        return {
+            'match_percentage': round(100 * covered / job_weight, 1) if job_weight else 0.0,
+            'similarity': round(dot(resume_vector, job_vector), 4),
+            'matched_terms': sorted(self.vocabulary.labels[term_id] for term_id in job_vector if term_id in resume_vector),
+            'missing_terms': [self.vocabulary.labels[term_id] for term_id in missing[:max_missing]]
+        }
@@ -0,0 +1,192 @@
+"""
+Durable background job queue
+
+Jobs are rows in a SQLite database, so they survive restarts and every
+worker process on the node can enqueue and poll them. Each process runs a
+few worker threads that claim queued jobs one at a time (an UPDATE guarded
+by the job's status, so two workers never run the same job) and store the
+result or error on the row. Jobs left running by a crashed process are
+requeued after `stale_after` seconds.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class JobQueue:
+    """SQLite-backed queue with in-process worker threads and named handlers"""
+
+    def __init__(self, path, workers=2, stale_after=300, max_attempts=3, retention=24 * 60 * 60, poll_interval=0.5):
+        self.path = path
+        self.workers = workers
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stopped = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, '
+                'result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, '
+                'created REAL NOT NULL, started REAL, finished REAL)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, created)')
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def register(self, kind, handler):
+        """Run `handler(payload)` for jobs of this kind; its return value is stored as the result"""
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind, payload):
+        """Store a job and return its ID; worker threads start on first use"""
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            'INSERT INTO jobs (id, kind, payload, status, created) VALUES (?, ?, ?, ?, ?)',
+            (job_id, kind, json.dumps(payload), 'queued', time.time())
+        )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it does not exist"""
+        row = self._connection().execute(
+            'SELECT id, kind, status, result, error, attempts, created, started, finished FROM jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(('id', 'kind', 'status', 'result', 'error', 'attempts', 'created', 'started', 'finished'), row))
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def _claim(self):
+        """Atomically move the oldest queued job to running; returns (id, kind, payload) or None"""
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', started = ?, attempts = attempts + 1 WHERE id = ?",
+                    (time.time(), row[0])
+                )
+            db.execute('COMMIT')
+        except sqlite3.Error:
+            db.execute('ROLLBACK')
+            raise
+        return row
+
+    def _finish(self, job_id, result=None, error=None):
+        self._connection().execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?',
+            ('failed' if error else 'done', json.dumps(result) if error is None else None, error, time.time(), job_id)
+        )
+
+    def recover(self):
+        """Requeue jobs whose worker died mid-run, fail those out of attempts, and drop old finished jobs"""
+        now = time.time()
+        db = self._connection()
+        db.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Worker stopped while running the job', finished = ? "
+            "WHERE status = 'running' AND started < ? AND attempts >= ?",
+            (now, now - self.stale_after, self.max_attempts)
+        )
+        db.execute(
+            "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND started < ?",
+            (now - self.stale_after,)
+        )
+        if self.retention:
+            db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                (now - self.retention,)
+            )
+
+    def resume(self):
+        """Recover stale jobs and start the workers if any job is unfinished; returns True if they started
+
+        Call at startup so jobs queued before a restart, or left running by a
+        crashed process, do not wait for the next enqueue in this process.
+        """
+        self.recover()
+        unfinished = self._connection().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchone()[0]
+        if unfinished:
+            self.start()
+        return bool(unfinished)
+
+    def run_one(self):
+        """Claim and run one job in the calling thread; returns False when the queue is empty"""
+        job = self._claim()
+        if job is None:
+            return False
+        job_id, kind, payload = job
+        handler = self.handlers.get(kind)
+        if handler is None:
+            self._finish(job_id, error=f"No handler for job kind '{kind}'")
+            return True
+        try:
+            result = handler(json.loads(payload))
+        except Exception as e:
+            print(f"Error running job {job_id}: {e}")
+            self._finish(job_id, error=str(e) or e.__class__.__name__)
+        else:
+            self._finish(job_id, result=result)
+        return True
+
+    def _work(self):
+        last_recovery = 0.0
+        while not self._stopped:
+            try:
+                if time.time() - last_recovery >= self.stale_after / 2:
+                    self.recover()
+                    last_recovery = time.time()
+                if self.run_one():
+                    continue
+            except Exception as e:
+                # A worker that dies is never restarted, so it logs the error and keeps polling
+                print(f"Job queue error: {e}")
+            # Jobs enqueued by other processes are picked up on the next poll
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        with self._start_lock:
+            if self._threads or self._stopped:
+                return
+            for index in range(max(1, self.workers)):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def stats(self):
+        rows = self._connection().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return dict(rows)
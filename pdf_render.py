@@ -0,0 +1,276 @@
+"""
+Resume PDF rendering on a warm process pool
+
+ReportLab layout is pure Python and holds the GIL, so PDFs are built in
+worker processes instead of the request thread. Each worker builds the
+stylesheet and loads the font metrics once, when it starts, and reuses
+them for every PDF. The pool refuses new work beyond `max_queue` PDFs in
+flight, and records how long each PDF waited for a worker separately from
+how long it took to render.
+
+PDFs go to a file, or with render_bytes() come back as bytes without
+touching disk. With workers=0, or where multiprocessing is unavailable,
+PDFs are rendered in the calling thread with the same cached styles.
+"""
+
+import html
+import io
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+_styles = None
+
+
+class RenderQueueFull(Exception):
+    """Raised when max_queue PDFs are already waiting or rendering"""
+
+
+def get_styles():
+    """Paragraph styles shared by every PDF this process renders, built on first use"""
+    global _styles
+    if _styles is None:
+        styles = getSampleStyleSheet()
+        styles.add(ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        ))
+        styles.add(ParagraphStyle(
+            'Contact',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=1
+        ))
+        # Load the metrics of the fonts the styles use
+        for font_name in ('Helvetica', 'Helvetica-Bold'):
+            pdfmetrics.getFont(font_name)
+        _styles = styles
+    return _styles
+
+
+def text_to_paragraph(text):
+    """Escape free text for a ReportLab Paragraph, keeping its line breaks"""
+    return '<br/>'.join(html.escape(line, quote=False) for line in text.split('\n'))
+
+
+def build_resume_pdf(resume_data, target):
+    """Lay out resume data as a PDF written to `target`, a path or a binary file object"""
+    styles = get_styles()
+    doc = SimpleDocTemplate(target, pagesize=letter)
+    story = []
+
+    # Title
+    story.append(Paragraph(resume_data.get('name', 'Resume'), styles['CustomTitle']))
+    story.append(Spacer(1, 12))
+
+    # Contact info
+    contact_info = f"{resume_data.get('email', '')} | {resume_data.get('phone', '')} | {resume_data.get('location', '')}"
+    story.append(Paragraph(contact_info, styles['Contact']))
+    story.append(Spacer(1, 20))
+
+    # Professional Summary
+    if resume_data.get('summary'):
+        story.append(Paragraph("Professional Summary", styles['Heading2']))
+        story.append(Paragraph(resume_data['summary'], styles['Normal']))
+        story.append(Spacer(1, 12))
+
+    # Skills
+    if resume_data.get('skills'):
+        story.append(Paragraph("Skills", styles['Heading2']))
+        skills_text = ", ".join(resume_data['skills'])
+        story.append(Paragraph(skills_text, styles['Normal']))
+        story.append(Spacer(1, 12))
+
+    # Experience
+    if resume_data.get('experience'):
+        story.append(Paragraph("Experience", styles['Heading2']))
+        # The resume builder sends free text instead of a list of entries
+        if isinstance(resume_data['experience'], str):
+            story.append(Paragraph(text_to_paragraph(resume_data['experience']), styles['Normal']))
+            story.append(Spacer(1, 8))
+        for exp in resume_data['experience'] if isinstance(resume_data['experience'], list) else []:
+            story.append(Paragraph(f"<b>{exp.get('title', '')}</b> - {exp.get('company', '')}", styles['Normal']))
+            story.append(Paragraph(f"{exp.get('duration', '')}", styles['Normal']))
+            story.append(Paragraph(exp.get('description', ''), styles['Normal']))
+            story.append(Spacer(1, 8))
+
+    # Education
+    if resume_data.get('education'):
+        story.append(Paragraph("Education", styles['Heading2']))
+        if isinstance(resume_data['education'], str):
+            story.append(Paragraph(text_to_paragraph(resume_data['education']), styles['Normal']))
+            story.append(Spacer(1, 8))
+        for edu in resume_data['education'] if isinstance(resume_data['education'], list) else []:
+            story.append(Paragraph(f"<b>{edu.get('degree', '')}</b> - {edu.get('institution', '')}", styles['Normal']))
+            story.append(Paragraph(f"{edu.get('year', '')}", styles['Normal']))
+            story.append(Spacer(1, 8))
+
+    doc.build(story)
+
+
+def _render(resume_data, pdf_path=None):
+    """Worker task: returns (result, started, finished) with wall-clock times
+
+    The result is True/False when writing to pdf_path, else the PDF bytes or None.
+    """
+    started = time.time()
+    try:
+        if pdf_path is None:
+            buffer = io.BytesIO()
+            build_resume_pdf(resume_data, buffer)
+            result = buffer.getvalue()
+        else:
+            build_resume_pdf(resume_data, pdf_path)
+            result = True
+    except Exception as e:
+        print(f"Error generating PDF: {e}")
+        result = None if pdf_path is None else False
+    return result, started, time.time()
+
+
+def _warm_worker():
+    get_styles()
+
+
+class PDFRenderPool:
+    """Process pool for PDF rendering with a queue-depth limit and wait/render timings"""
+
+    def __init__(self, workers=2, max_queue=16, timeout=30):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.depth = 0
+        self.rendered = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_seconds = 0.0
+        self.render_seconds = 0.0
+        self.last = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        """The process pool, started on first use; None when rendering inline"""
+        with self._lock:
+            if self._pool is None and self.workers > 0:
+                try:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+                except OSError as e:
+                    # Environments without working multiprocessing (e.g. no sem_open) always render inline
+                    print(f"PDF render pool unavailable, rendering inline: {e}")
+                    self.workers = 0
+            return self._pool
+
+    def _discard_pool(self):
+        """Drop a broken pool; the next render starts a new one"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def warm(self):
+        """Start every worker now so the first requests do not pay for process start-up"""
+        try:
+            pool = self._get_pool()
+            if pool is None:
+                get_styles()
+                return
+            for future in [pool.submit(_warm_worker) for _ in range(self.workers)]:
+                future.result(timeout=self.timeout)
+        except (BrokenProcessPool, OSError, FuturesTimeout) as e:
+            print(f"PDF render pool unavailable, rendering inline: {e}")
+            self._discard_pool()
+
+    def render(self, resume_data, pdf_path):
+        """Render a resume PDF to pdf_path; returns True on success
+
+        Raises RenderQueueFull when max_queue PDFs are already in flight.
+        """
+        return self._run(resume_data, pdf_path) is True
+
+    def render_bytes(self, resume_data):
+        """Render a resume PDF in memory; returns its bytes, or None on failure
+
+        Raises RenderQueueFull when max_queue PDFs are already in flight.
+        """
+        return self._run(resume_data, None)
+
+    def _run(self, resume_data, pdf_path):
+        with self._lock:
+            if self.max_queue and self.depth >= self.max_queue:
+                self.rejected += 1
+                raise RenderQueueFull(f"{self.depth} PDFs are already queued")
+            self.depth += 1
+        release = True
+        try:
+            submitted = time.time()
+            future = None
+            try:
+                pool = self._get_pool()
+                if pool is not None:
+                    future = pool.submit(_render, resume_data, pdf_path)
+                    result, started, finished = future.result(timeout=self.timeout)
+            except FuturesTimeout:
+                print(f"PDF render did not finish within {self.timeout}s")
+                # The worker is still busy with it, so it keeps its place in the queue until done
+                release = False
+                future.add_done_callback(lambda done: self._release())
+                result, started, finished = None, submitted, time.time()
+            except (BrokenProcessPool, OSError) as e:
+                # A crashed worker breaks the whole pool; render this one inline and start a new pool next time
+                print(f"PDF render pool broken, rendering inline: {e}")
+                self._discard_pool()
+                future = None
+                submitted = time.time()
+            if future is None:
+                result, started, finished = _render(resume_data, pdf_path)
+        finally:
+            if release:
+                self._release()
+        self._record(bool(result), max(started - submitted, 0.0), max(finished - started, 0.0))
+        return result
+
+    def _release(self):
+        with self._lock:
+            self.depth -= 1
+
+    def _record(self, ok, queue_seconds, render_seconds):
+        with self._lock:
+            if ok:
+                self.rendered += 1
+            else:
+                self.failed += 1
+            self.queue_seconds += queue_seconds
+            self.render_seconds += render_seconds
+            self.last = {'queue_ms': round(queue_seconds * 1000, 3), 'render_ms': round(render_seconds * 1000, 3)}
+
+    def stats(self):
+        with self._lock:
+            count = self.rendered + self.failed
+            return {
+                'workers': self.workers,
+                'queue_depth': self.depth,
+                'max_queue': self.max_queue,
+                'rendered': self.rendered,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'average_queue_ms': round(self.queue_seconds * 1000 / count, 3) if count else 0.0,
+                'average_render_ms': round(self.render_seconds * 1000 / count, 3) if count else 0.0,
+                'last': self.last
+            }
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,158 @@
+"""
+Resume corpus ranking
+
+Per-resume TF-IDF vectors (see job_matching.Vocabulary) are appended to a
+flat binary file of (term, weight) records and read back through a NumPy
+memory map, so the corpus is paged in lazily by the OS and ranking a job
+is a few array operations instead of a Python loop over resumes.
+documents.jsonl records where each resume's vector starts and its length.
+
+Several workers can append to the same corpus; writes are serialized with
+a lock file and every reader picks up new documents before ranking.
+"""
+
+import heapq
+import json
+import os
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+RECORD_DTYPE = np.dtype([('term', '<i4'), ('weight', '<f4')])
+
+
+class CorpusStore:
+    """Append-only store of sparse resume vectors with memory-mapped reads"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, 'vectors.bin')
+        self.documents_path = os.path.join(directory, 'documents.jsonl')
+        self.lock_path = os.path.join(directory, '.lock')
+        os.makedirs(directory, exist_ok=True)
+
+        self.ids = []
+        self.filenames = []
+        self.offsets = []
+        self.lengths = []
+        self.positions = {}
+        self._documents_offset = 0
+        self._arrays = None
+        self._vectors = None
+        self._mapped_records = 0
+        self._lock = threading.RLock()
+        self.refresh()
+
+    def __len__(self):
+        with self._lock:
+            return len(self.ids)
+
+    def __contains__(self, resume_id):
+        self.refresh()
+        with self._lock:
+            return resume_id in self.positions
+
+    def refresh(self):
+        """Load document entries appended since the last call (possibly by other workers)"""
+        try:
+            if os.path.getsize(self.documents_path) == self._documents_offset:
+                return
+        except OSError:
+            return
+        with self._lock:
+            with open(self.documents_path, 'r', encoding='utf-8') as f:
+                f.seek(self._documents_offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith('\n'):
+                        break
+                    self._documents_offset = f.tell()
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry['id'] in self.positions:
+                        continue
+                    self.positions[entry['id']] = len(self.ids)
+                    self.ids.append(entry['id'])
+                    self.filenames.append(entry.get('filename'))
+                    self.offsets.append(entry['offset'])
+                    self.lengths.append(entry['length'])
+                    self._arrays = None
+
+    def add(self, resume_id, filename, vector):
+        """Append a resume's sparse vector ({term_id: weight}); returns False if already stored"""
+        records = np.array(sorted(vector.items()), dtype=RECORD_DTYPE) if vector else np.zeros(0, RECORD_DTYPE)
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                if resume_id in self.positions:
+                    return False
+                with open(self.vectors_path, 'ab') as f:
+                    # Start after the last complete record, skipping any torn write
+                    offset = f.seek(0, os.SEEK_END) // RECORD_DTYPE.itemsize
+                    f.seek(offset * RECORD_DTYPE.itemsize)
+                    f.truncate()
+                    f.write(records.tobytes())
+                entry = {'id': resume_id, 'filename': filename, 'offset': offset, 'length': len(records)}
+                with open(self.documents_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + '\n')
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self.refresh()
+        return True
+
+    def _mapped(self):
+        """Memory map of all records referenced by known documents"""
+        needed = max((offset + length for offset, length in zip(self.offsets, self.lengths)), default=0)
+        if self._vectors is None or self._mapped_records < needed:
+            self._vectors = np.memmap(self.vectors_path, dtype=RECORD_DTYPE, mode='r', shape=(needed,)) if needed else np.zeros(0, RECORD_DTYPE)
+            self._mapped_records = needed
+        if self._arrays is None:
+            self._arrays = (np.array(self.offsets, dtype=np.int64), np.array(self.lengths, dtype=np.int64))
+        return self._vectors, self._arrays
+
+    def scores(self, job_vector, vocabulary_size):
+        """Dot product of the job vector with every stored resume vector"""
+        self.refresh()
+        with self._lock:
+            if not self.ids:
+                return np.zeros(0, dtype=np.float64)
+            vectors, (offsets, lengths) = self._mapped()
+            query = np.zeros(vocabulary_size, dtype=np.float64)
+            for term_id, weight in job_vector.items():
+                query[term_id] = weight
+
+            # One gather over all records, then per-document sums from a running total
+            contributions = query[vectors['term']] * vectors['weight']
+            cumulative = np.concatenate(([0.0], np.cumsum(contributions)))
+            return cumulative[offsets + lengths] - cumulative[offsets]
+
+    def top_k(self, job_vector, vocabulary_size, k=10, page=1):
+        """Return (candidates, results) for one page of the highest scoring resumes
+
+        A heap keeps only the best page * k resumes, so the corpus is never
+        fully sorted. Resumes sharing no term with the job are not candidates.
+        """
+        scores = self.scores(job_vector, vocabulary_size)
+        candidates = np.flatnonzero(scores > 1e-9).tolist()
+        score_list = scores.tolist()
+        # nlargest is stable, so ties keep insertion order
+        best = heapq.nlargest(page * k, candidates, key=score_list.__getitem__)
+        results = []
+        with self._lock:
+            for position in best[(page - 1) * k:]:
+                results.append({
+                    'resume_id': self.ids[position],
+                    'filename': self.filenames[position],
+                    'score': round(score_list[position], 4)
+                })
+        return len(candidates), results
@@ -0,0 +1,135 @@
+"""
+Backpressure for the inference backend
+
+TokenBucket spaces out requests and adapts to the backend: a 429 (or a
+Retry-After header) halves the refill rate and pauses the bucket, and every
+success raises the rate again by a fixed step up to the configured
+maximum. CircuitBreaker stops calls to a failing backend for a while so
+requests fail fast to the local fallback instead of paying a round trip.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate backs off on 429 and recovers on success"""
+
+    def __init__(self, rate=10.0, capacity=10, min_rate=0.5, recovery_step=0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min(min_rate, rate)
+        self.recovery_step = recovery_step
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting up to `timeout` seconds; returns False if none came in time"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate, 0.001)
+            if deadline is not None:
+                if time.monotonic() + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+    def penalize(self, retry_after=None):
+        """Back off after a 429: halve the rate and pause for Retry-After (or one token interval)"""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.tokens = 0.0
+
+    def reward(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+    def state(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'tokens': round(self.tokens, 3),
+                'paused_for': round(max(self.blocked_until - time.monotonic(), 0), 3),
+                'throttled': self.throttled
+            }
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures -> half-open after `reset_timeout`
+
+    While half-open, a single probe call is let through; its outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.status = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def available(self):
+        """True unless the circuit is open and its reset timeout has not passed"""
+        with self._lock:
+            return self.status != 'open' or time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def allow(self):
+        """Return True if a call may go to the backend now"""
+        with self._lock:
+            if self.status == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.status = 'half_open'
+                self._probing = False
+            if self.status == 'closed':
+                return True
+            if self.status == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.status = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.status == 'half_open' or self.failures >= self.failure_threshold:
+                self.status = 'open'
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def state(self):
+        with self._lock:
+            retry_in = None
+            if self.status == 'open':
+                retry_in = round(max(self.reset_timeout - (time.monotonic() - self.opened_at), 0), 3)
+            return {
+                'status': self.status,
+                'consecutive_failures': self.failures,
+                'rejected': self.rejected,
+                'retry_in': retry_in
+            }
@@ -0,0 +1,121 @@
+"""
+Resume template registry
+
+Generated resumes are Jinja2 templates in templates/resumes/ that extend a
+shared layout (base.html) and only override its style and section titles.
+Every template is compiled once when the registry is built, so a /generate
+request only renders. Autoescaping is on, so resume fields never need
+manual escaping.
+
+Templates come from Config.RESUME_TEMPLATES (id -> name, description,
+preview and an optional `template` file name); any other .html file in the
+template directory is registered too, under its file name, so a new
+template can be added by dropping in a file.
+"""
+
+import hashlib
+import os
+import time
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'resumes')
+LAYOUT_TEMPLATE = 'base.html'
+
+# Field defaults for resume data that leaves them out
+DEFAULT_FIELDS = {
+    'name': 'Your Name',
+    'title': 'Professional Title',
+    'email': 'email@example.com',
+    'phone': 'Phone Number',
+    'summary': 'Professional summary goes here...',
+    'experience': 'Work experience details...',
+    'education': 'Education details...',
+    'skills': []
+}
+
+SAMPLE_RESUME = {
+    'name': 'Jane Doe',
+    'title': 'Senior Software Engineer',
+    'email': 'jane@example.com',
+    'phone': '(555) 123-4567',
+    'summary': 'Backend engineer with eight years of Python experience.',
+    'experience': 'Senior Engineer, Acme (2019-2024)\n- Led the move to Kubernetes\n- Built the billing API',
+    'education': 'BSc Computer Science, State University (2015)',
+    'skills': ['Python', 'Flask', 'PostgreSQL', 'Docker', 'Kubernetes', 'AWS']
+}
+
+
+def nl2br(value):
+    """Escape a value and turn its newlines into <br> tags"""
+    return Markup('<br>').join(escape(value).split('\n'))
+
+
+class TemplateRegistry:
+    """Compiled resume templates by ID"""
+
+    def __init__(self, templates=None, directory=DEFAULT_TEMPLATE_DIR, default='minimal'):
+        self.environment = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False,
+            # None fields render as empty strings, not 'None'
+            finalize=lambda value: '' if value is None else value
+        )
+        self.environment.filters['nl2br'] = nl2br
+
+        self.templates = {}
+        for template_id, info in (templates or {}).items():
+            self.templates[template_id] = dict(info, id=template_id, template=info.get('template', f"{template_id}.html"))
+        configured = {info['template'] for info in self.templates.values()} | {LAYOUT_TEMPLATE}
+        for filename in sorted(os.listdir(directory)):
+            template_id, extension = os.path.splitext(filename)
+            if extension == '.html' and filename not in configured and template_id not in self.templates:
+                self.templates[template_id] = {
+                    'id': template_id,
+                    'name': template_id.replace('_', ' ').title(),
+                    'description': '',
+                    'template': filename
+                }
+
+        self.compiled = {
+            template_id: self.environment.get_template(info['template']) for template_id, info in self.templates.items()
+        }
+        self.default = default if default in self.compiled else next(iter(self.compiled), None)
+
+        # Changes whenever a template source changes, so caches of rendered output can key on it
+        digest = hashlib.sha256()
+        for filename in sorted({info['template'] for info in self.templates.values()} | {LAYOUT_TEMPLATE}):
+            source = self.environment.loader.get_source(self.environment, filename)[0]
+            digest.update(f"{filename}\0{source}\0".encode('utf-8'))
+        self.fingerprint = digest.hexdigest()
+
+    def __contains__(self, template_id):
+        return template_id in self.compiled
+
+    def metadata(self):
+        """Template metadata in registration order"""
+        return [
+            {key: info[key] for key in ('id', 'name', 'description', 'preview') if key in info}
+            for info in self.templates.values()
+        ]
+
+    def render(self, template_id, resume_data):
+        """Render resume data with a template; unknown IDs use the default template"""
+        template = self.compiled.get(template_id) or self.compiled[self.default]
+        context = dict(DEFAULT_FIELDS)
+        context.update(resume_data)
+        return template.render(context)
+
+    def benchmark(self, iterations=1000, resume_data=None):
+        """Average render time per template in milliseconds"""
+        resume_data = resume_data or SAMPLE_RESUME
+        timings = {}
+        for template_id in self.compiled:
+            self.render(template_id, resume_data)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                self.render(template_id, resume_data)
+            timings[template_id] = round((time.perf_counter() - started) * 1000 / iterations, 4)
+        return timings
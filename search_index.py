@@ -0,0 +1,182 @@
+"""
+Inverted index from normalized skill/keyword terms to resume IDs
+
+Postings live in memory as sets, so boolean queries are a handful of set
+operations. Every change is appended to a JSONL log; workers replay new
+log lines before each query, which keeps all workers on a node in sync
+and lets the index survive restarts.
+
+Query syntax:
+    kubernetes go             both terms (AND is implicit)
+    python OR java            either term
+    python NOT django         exclude a term
+    kube*                     any term starting with "kube"
+    "machine learning"        multi-word term
+    missing:docker            resumes whose analysis lists docker as missing
+"""
+
+import bisect
+import heapq
+import json
+import os
+import re
+import threading
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def normalize_term(term):
+    """Lowercase and collapse whitespace so 'Machine  Learning' == 'machine learning'"""
+    return ' '.join(str(term).lower().split())
+
+
+class QueryError(ValueError):
+    """Raised for queries that cannot be parsed"""
+
+
+class SkillIndex:
+    """Incrementally updated inverted index with an append-only log"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.postings = {}
+        self.documents = {}
+        self._sorted_terms = []
+        self._terms_dirty = False
+        self._offset = 0
+        self._lock = threading.Lock()
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.refresh()
+
+    def _apply(self, resume_id, filename, terms):
+        previous = self.documents.get(resume_id)
+        if previous:
+            for term in previous['terms']:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.discard(resume_id)
+                    if not postings:
+                        del self.postings[term]
+                        self._terms_dirty = True
+        for term in terms:
+            if term not in self.postings:
+                self.postings[term] = set()
+                self._terms_dirty = True
+            self.postings[term].add(resume_id)
+        self.documents[resume_id] = {'filename': filename, 'terms': terms}
+
+    def refresh(self):
+        """Replay log lines written since the last refresh (possibly by other workers)"""
+        if not self.path:
+            return
+        try:
+            if os.path.getsize(self.path) == self._offset:
+                return
+        except OSError:
+            return
+        with self._lock:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                f.seek(self._offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith('\n'):
+                        break  # partial line from a concurrent writer; read it next time
+                    self._offset = f.tell()
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(entry['id'], entry.get('filename'), entry.get('terms', []))
+
+    def add(self, resume_id, filename, terms):
+        """Index a resume under the given terms, replacing any earlier entry for it"""
+        terms = sorted({normalize_term(term) for term in terms if normalize_term(term)})
+        self.refresh()
+        with self._lock:
+            previous = self.documents.get(resume_id)
+            if previous and previous['terms'] == terms and previous['filename'] == filename:
+                return
+            if self.path:
+                entry = json.dumps({'id': resume_id, 'filename': filename, 'terms': terms}) + '\n'
+                try:
+                    # A single O_APPEND write keeps lines from concurrent workers intact
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(entry)
+                except OSError as e:
+                    print(f"Error writing search index: {e}")
+            self._apply(resume_id, filename, terms)
+
+    def _prefix_postings(self, prefix):
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self.postings)
+            self._terms_dirty = False
+        matched = set()
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            matched |= self.postings[term]
+        return matched
+
+    def _term_postings(self, token):
+        if token.endswith('*'):
+            prefix = normalize_term(token[:-1])
+            if not prefix:
+                raise QueryError('Prefix queries need at least one character')
+            return self._prefix_postings(prefix)
+        return self.postings.get(normalize_term(token), set())
+
+    @staticmethod
+    def parse(query):
+        """Parse a query into OR-ed clauses of (include, exclude) term lists"""
+        clauses = [([], [])]
+        negate = False
+        for quoted, word in _TOKEN_RE.findall(query):
+            if word in ('AND', 'OR', 'NOT'):
+                if word == 'OR':
+                    if negate or not clauses[-1][0] and not clauses[-1][1]:
+                        raise QueryError('OR must sit between terms')
+                    clauses.append(([], []))
+                elif word == 'NOT':
+                    negate = True
+                continue
+            token = quoted if quoted else word
+            clauses[-1][1 if negate else 0].append(token)
+            negate = False
+        if negate or any(not include and not exclude for include, exclude in clauses):
+            raise QueryError('Incomplete query')
+        if any(not include for include, _ in clauses):
+            raise QueryError('NOT needs at least one positive term in the same clause')
+        return clauses
+
+    def search(self, query, limit=None):
+        """Return (total, resume_ids) for a query; IDs are sorted and cut to `limit`"""
+        clauses = self.parse(query)
+        self.refresh()
+        with self._lock:
+            results = set()
+            for include, exclude in clauses:
+                sets = sorted((self._term_postings(token) for token in include), key=len)
+                matched = set(sets[0])
+                for postings in sets[1:]:
+                    if not matched:
+                        break
+                    matched &= postings
+                for token in exclude:
+                    matched -= self._term_postings(token)
+                results |= matched
+        if limit is not None and limit < len(results):
+            return len(results), heapq.nsmallest(limit, results)
+        return len(results), sorted(results)
+
+    def describe(self, resume_id):
+        with self._lock:
+            document = self.documents.get(resume_id, {})
+            return {'resume_id': resume_id, 'filename': document.get('filename')}
+
+    def stats(self):
+        with self._lock:
+            return {'documents': len(self.documents), 'terms': len(self.postings)}
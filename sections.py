@@ -0,0 +1,100 @@
+"""
+Resume section segmentation
+
+Splits extracted resume text into its sections (summary, experience,
+education, skills, projects, ...) in one pass over the lines: a short line
+whose normalized text is a known heading, optionally followed by a colon
+and inline content, starts a new section. Each section records character
+offsets into the original text, so callers can slice out just the parts
+they need. Segmentations are cached by a hash of the text, because one
+document is scored, analyzed and prompted from several places.
+"""
+
+import hashlib
+import re
+
+from cache import LRUCache
+
+# Canonical section name -> headings that introduce it (lowercase, letters and spaces only)
+SECTION_HEADINGS = {
+    'summary': ['summary', 'professional summary', 'career summary', 'profile', 'professional profile',
+                'objective', 'career objective', 'about', 'about me'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history'],
+    'education': ['education', 'academic background', 'education and training', 'qualifications'],
+    'skills': ['skills', 'technical skills', 'core skills', 'key skills', 'core competencies',
+               'competencies', 'technologies', 'tools and technologies'],
+    'projects': ['projects', 'personal projects', 'key projects', 'selected projects', 'academic projects'],
+    'certifications': ['certifications', 'certificates', 'licenses and certifications'],
+}
+
+# Longer lines are body text, never headings
+MAX_HEADING_CHARS = 40
+
+_NON_LETTERS_RE = re.compile(r'[^a-z ]+')
+
+
+def normalize_heading(line):
+    """Lowercase letters-and-spaces form of a candidate heading line"""
+    return ' '.join(_NON_LETTERS_RE.sub(' ', line.lower().replace('&', ' and ')).split())
+
+
+class SectionSegmenter:
+    """Finds section headings in resume text, with a per-document cache"""
+
+    def __init__(self, headings=None, cache_size=256):
+        self.headings = {}
+        for name, titles in (headings or SECTION_HEADINGS).items():
+            for title in titles:
+                self.headings.setdefault(normalize_heading(title), name)
+        self.cache = LRUCache(cache_size)
+
+    def _heading_at(self, line):
+        """Return (section name, offset of inline content) if the line is a heading, else None"""
+        if len(line) > MAX_HEADING_CHARS * 2:
+            return None
+        title, colon, _ = line.partition(':')
+        if len(title.strip()) > MAX_HEADING_CHARS:
+            return None
+        name = self.headings.get(normalize_heading(title))
+        if name is None:
+            return None
+        return name, len(title) + len(colon)
+
+    def _segment(self, text):
+        sections = []
+        position = 0
+        length = len(text)
+        while position < length:
+            line_end = text.find('\n', position)
+            if line_end == -1:
+                line_end = length
+            heading = self._heading_at(text[position:line_end])
+            if heading is not None:
+                name, body_offset = heading
+                if sections:
+                    sections[-1]['end'] = position
+                sections.append({'name': name, 'start': position, 'body_start': position + body_offset, 'end': length})
+            position = line_end + 1
+        return sections
+
+    def segment(self, text):
+        """Sections of `text` in order, as dicts with name, start, body_start and end offsets
+
+        The text before the first heading (name, contact details) is not a section.
+        """
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        sections = self.cache.get(key)
+        if sections is None:
+            sections = self._segment(text)
+            self.cache.set(key, sections)
+        return sections
+
+    def texts(self, text):
+        """{section name: body text}; repeated sections are joined in order"""
+        bodies = {}
+        for section in self.segment(text):
+            body = text[section['body_start']:section['end']].strip()
+            if body:
+                bodies[section['name']] = f"{bodies[section['name']]}\n{body}" if section['name'] in bodies else body
+        return bodies
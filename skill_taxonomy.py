@@ -0,0 +1,113 @@
+"""
+Local skill extraction against a skill taxonomy
+
+Every skill name and alias is tokenized like job_matching does and
+inserted into a token trie, built once per process. Extraction is one pass
+over the resume tokens that follows the trie from each position and keeps
+the longest match, so its cost depends on the resume length and the longest
+alias, not on the size of the taxonomy.
+
+Taxonomy file format (data/skill_taxonomy.json):
+    {"skills": {"Kubernetes": {"category": "devops", "aliases": ["k8s"]}, ...}}
+"""
+
+import json
+import os
+import re
+
+from job_matching import tokenize
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'skill_taxonomy.json')
+
+_END = ''  # trie key marking the end of a name; tokens are never empty
+_COMPOUND_RE = re.compile(r'[/-]')
+
+
+class SkillTaxonomy:
+    """Skill names and aliases compiled into a token trie"""
+
+    def __init__(self, path=DEFAULT_TAXONOMY_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.labels = []
+        self.categories = []
+        self.trie = {}
+        self.max_tokens = 0
+        self.alias_count = 0
+        for label, info in sorted(data['skills'].items()):
+            skill_id = len(self.labels)
+            self.labels.append(label)
+            self.categories.append(info.get('category', 'general'))
+            for name in [label] + list(info.get('aliases', [])):
+                self._insert(tokenize(name), skill_id)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _insert(self, tokens, skill_id):
+        if not tokens:
+            return
+        node = self.trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        # The first definition of a name wins, so a label is never shadowed by another skill's alias
+        node.setdefault(_END, skill_id)
+        self.alias_count += 1
+        self.max_tokens = max(self.max_tokens, len(tokens))
+
+    def match_counts(self, text):
+        """Count skill mentions in text as {skill_id: count}
+
+        Matches do not overlap; parts of compound tokens such as
+        python/django also count on their own.
+        """
+        tokens = tokenize(text)
+        trie = self.trie
+        counts = {}
+        start = 0
+        end = len(tokens)
+        while start < end:
+            token = tokens[start]
+            node = trie.get(token)
+            if node is None:
+                # Most tokens are not skills; only compounds need a second look
+                if '/' in token or '-' in token:
+                    for part in _COMPOUND_RE.split(token):
+                        part_id = trie.get(part, {}).get(_END)
+                        if part_id is not None:
+                            counts[part_id] = counts.get(part_id, 0) + 1
+                start += 1
+                continue
+
+            # Follow the trie as far as it goes and keep the longest complete name
+            skill_id = node.get(_END)
+            length = 1
+            position = start + 1
+            while position < end:
+                node = node.get(tokens[position])
+                if node is None:
+                    break
+                position += 1
+                if _END in node:
+                    skill_id = node[_END]
+                    length = position - start
+            if skill_id is None:
+                start += 1
+                continue
+            counts[skill_id] = counts.get(skill_id, 0) + 1
+            start += length
+        return counts
+
+    def extract(self, text, limit=None):
+        """Skills found in text, most mentioned first, plus the same skills grouped by category"""
+        counts = self.match_counts(text)
+        ordered = sorted(counts, key=lambda skill_id: (-counts[skill_id], self.labels[skill_id]))
+        if limit:
+            ordered = ordered[:limit]
+        by_category = {}
+        for skill_id in ordered:
+            by_category.setdefault(self.categories[skill_id], []).append(self.labels[skill_id])
+        return {
+            'skills': [self.labels[skill_id] for skill_id in ordered],
+            'categories': by_category
+        }
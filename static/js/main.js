@@ -1,6 +1,7 @@
 // Main JavaScript file for Resume Analyzer
 // Global variables
 let currentAnalysis = null;
+let currentFile = null;
 let currentResumeData = null;
 let chartInstances = {};
 
@@ -108,30 +109,49 @@ function handleFileUpload(file) {
     
     const formData = new FormData();
     formData.append('file', file);
+    // The results view does not show the raw text, so skip decoding pages analysis does not need
+    formData.append('full_text', 'false');
+    // Stream results so the ATS score shows before the slower AI sections
+    formData.append('stream', 'true');
     
     // Show progress
     showUploadProgress();
     
     // Upload file
+    let streamed = false;
     fetch('/upload', {
         method: 'POST',
         body: formData
     })
     .then(response => {
         if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        return response.json();
-    })
-    .then(data => {
-        if (data.error) {
-            throw new Error(data.error);
+            return response.json().then(data => {
+                throw new Error(data.error || `HTTP error! status: ${response.status}`);
+            });
         }
-        
-        currentAnalysis = data;
-        currentResumeData = data;
-        displayResults(data);
-        showNotification('Resume analyzed successfully!', 'success');
+        return readEventStream(response, (event, data) => {
+            if (event === 'error') {
+                throw new Error(data.error);
+            }
+            if (event === 'extraction') {
+                streamed = true;
+                showModal('resultsModal');
+                resetUpload();
+            } else if (event === 'ats') {
+                updateATSScore(data.ats_score);
+            } else if (event === 'section') {
+                updateSection(data.key, data.value);
+            } else if (event === 'done') {
+                currentAnalysis = data;
+                currentResumeData = data;
+                currentFile = file;
+                // Cached results arrive in one piece
+                if (!streamed) {
+                    displayResults(data);
+                }
+                showNotification('Resume analyzed successfully!', 'success');
+            }
+        });
     })
     .catch(error => {
         console.error('Upload error:', error);
@@ -201,6 +221,57 @@ function displayResults(data) {
     resetUpload();
 }
 
+// Render one analysis section as it arrives from the event stream
+function updateSection(key, value) {
+    if (!value) return;
+    if (key === 'rating') {
+        updateScore(value.score, value.feedback);
+    } else if (key === 'highlights') {
+        updateHighlights(value);
+    } else if (key === 'suggestions') {
+        updateSuggestions(value);
+    } else if (key === 'summary') {
+        updateSummary(value);
+    }
+}
+
+// Read a Server-Sent Events response body, calling onEvent(event, data) per event
+function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    function dispatch(block) {
+        let event = 'message';
+        const dataLines = [];
+        block.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        if (dataLines.length) {
+            onEvent(event, JSON.parse(dataLines.join('\n')));
+        }
+    }
+    
+    function pump() {
+        return reader.read().then(({ done, value }) => {
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                dispatch(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+            }
+            if (!done) {
+                return pump();
+            }
+        });
+    }
+    return pump();
+}
+
 function updateScore(score, feedback) {
     const scoreElement = document.getElementById('overallScore');
     const feedbackElement = document.getElementById('scoreFeedback');
@@ -459,29 +530,29 @@ function generateResumeWithTemplate() {
         generateBtn.textContent = 'Generating...';
         generateBtn.disabled = true;
         
-        fetch('/generate', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                template_id: templateId,
-                resume_data: resumeData
-            })
-        })
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                showDownloadLinks(data);
+        // Both files come back in the response itself, so no second request to /download is needed.
+        // Each format is reported on its own, so a failed PDF does not lose the HTML
+        Promise.allSettled([
+            fetchGeneratedFile(templateId, resumeData, 'html'),
+            fetchGeneratedFile(templateId, resumeData, 'pdf')
+        ])
+        .then(([html, pdf]) => {
+            const failed = [['HTML', html], ['PDF', pdf]].filter(([, result]) => result.status === 'rejected');
+            failed.forEach(([format, result]) => {
+                console.error(`Error generating ${format}:`, result.reason);
+                showNotification(`Error generating ${format} resume: ` + result.reason.message, 'error');
+            });
+            if (failed.length === 2) {
+                return;
+            }
+            showDownloadLinks({
+                html_url: html.status === 'fulfilled' ? html.value : null,
+                pdf_url: pdf.status === 'fulfilled' ? pdf.value : null
+            });
+            if (!failed.length) {
                 showNotification('Resume generated successfully!', 'success');
-            } else {
-                throw new Error(data.error || 'Unknown error');
             }
         })
-        .catch(error => {
-            console.error('Error:', error);
-            showNotification('Error generating resume: ' + error.message, 'error');
-        })
         .finally(() => {
             generateBtn.textContent = originalText;
             generateBtn.disabled = false;
@@ -489,6 +560,29 @@ function generateResumeWithTemplate() {
     }
 }
 
+function fetchGeneratedFile(templateId, resumeData, output) {
+    return fetch('/generate', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            template_id: templateId,
+            resume_data: resumeData,
+            output: output
+        })
+    })
+    .then(response => {
+        if (!response.ok) {
+            return response.json().then(data => {
+                throw new Error(data.error || 'Unknown error');
+            });
+        }
+        return response.blob();
+    })
+    .then(blob => URL.createObjectURL(blob));
+}
+
 function showDownloadLinks(data) {
     const modal = document.getElementById('templateSelectionModal');
     const downloadSection = document.createElement('div');
@@ -499,12 +593,14 @@ function showDownloadLinks(data) {
             <h3>Resume Generated Successfully!</h3>
         </div>
         <div class="download-buttons">
-            <a href="${data.html_url}" class="btn btn-secondary" download>
+            ${data.html_url ? `
+            <a href="${data.html_url}" class="btn btn-secondary" download="resume.html">
                 <i class="fas fa-file-code"></i> Download HTML
-            </a>
-            <a href="${data.pdf_url}" class="btn btn-primary" download>
+            </a>` : ''}
+            ${data.pdf_url ? `
+            <a href="${data.pdf_url}" class="btn btn-primary" download="resume.pdf">
                 <i class="fas fa-file-pdf"></i> Download PDF
-            </a>
+            </a>` : ''}
         </div>
         <div class="next-steps">
             <p>You can now use this resume to apply for jobs or upload it back to our analyzer for further improvements!</p>
@@ -530,18 +626,53 @@ function analyzeJobMatch() {
         return;
     }
     
-    // Mock job analysis (in real app, this would call an API)
-    const missingSkills = ['Docker', 'AWS', 'React', 'Agile', 'CI/CD'];
-    const matchPercentage = Math.floor(Math.random() * 30) + 70; // 70-100%
+    if (!currentAnalysis || !currentAnalysis.resume_text) {
+        showNotification('Please upload a resume first', 'warning');
+        return;
+    }
+    
+    // resume_text stops at the analysis budget; send the PDF so the whole resume is matched
+    let body;
+    const extraction = currentAnalysis.extraction || {};
+    if (currentFile && extraction.next_page !== null && extraction.next_page !== undefined) {
+        body = new FormData();
+        body.append('file', currentFile);
+        body.append('target_job', jobTitle);
+    } else {
+        body = JSON.stringify({
+            resume_text: currentAnalysis.resume_text,
+            target_job: jobTitle
+        });
+    }
     
+    fetch('/match', {
+        method: 'POST',
+        headers: body instanceof FormData ? {} : {
+            'Content-Type': 'application/json'
+        },
+        body: body
+    })
+    .then(response => response.json().then(data => {
+        if (!response.ok) {
+            throw new Error(data.error || `HTTP error! status: ${response.status}`);
+        }
+        renderJobComparison(jobTitle, data);
+    }))
+    .catch(error => {
+        console.error('Job match error:', error);
+        showNotification('Job match failed: ' + error.message, 'error');
+    });
+}
+
+function renderJobComparison(jobTitle, comparison) {
     const missingSkillsDiv = document.getElementById('missingSkills');
     if (missingSkillsDiv) {
         missingSkillsDiv.innerHTML = `
             <div class="match-info">
-                <h4>Match with "${escapeHtml(jobTitle)}": ${matchPercentage}%</h4>
+                <h4>Match with "${escapeHtml(jobTitle)}": ${comparison.match_percentage}%</h4>
                 <div class="missing-skills-list">
                     <h5>Missing Skills:</h5>
-                    ${missingSkills.map(skill => `<span class="missing-skill">${escapeHtml(skill)}</span>`).join('')}
+                    ${comparison.missing_skills.map(skill => `<span class="missing-skill">${escapeHtml(skill)}</span>`).join('')}
                 </div>
             </div>
         `;
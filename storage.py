@@ -0,0 +1,236 @@
+"""
+Bounded file storage
+
+StorageManager tracks the files of one directory with their size and last
+access, grouped into entries (the HTML and PDF of one generated resume are
+one entry), and keeps the directory within a byte quota and an entry count
+by deleting the least recently used entries. Entries not accessed for `ttl`
+seconds expire. Accesses also set the file's mtime, so recency is shared by
+every process using the directory and survives restarts.
+
+Quotas are enforced whenever a file is added; a StorageSweeper thread also
+expires old entries, picks up files written by other processes, forgets
+files deleted behind the index's back and removes abandoned temporary
+files. Quotas and TTLs of 0 mean no limit.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Temporary files older than this were abandoned by a crashed writer
+TEMP_FILE_MAX_AGE = 60 * 60
+
+
+class StorageManager:
+    """Files in one directory, evicted least recently used first to stay within quotas"""
+
+    def __init__(self, directory, max_bytes=0, max_entries=0, ttl=0, entry_key=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # filename -> entry key, or None for files this manager leaves alone
+        self.entry_key = entry_key or (lambda filename: None if filename.startswith('.') else filename)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.last_sweep = None
+        self._entries = OrderedDict()  # key -> {'files': {filename: size}, 'accessed': timestamp}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.sweep()
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def add(self, filename):
+        """Track a file just written to the directory, then evict entries beyond the quotas"""
+        key = self.entry_key(filename)
+        if key is None:
+            return
+        try:
+            size = os.stat(self.path(filename)).st_size
+        except OSError:
+            return
+        with self._lock:
+            self._track(key, filename, size, time.time())
+            self._enforce_quotas()
+
+    def get(self, key):
+        """Filenames stored under `key`, marking them accessed; None if there are none"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                # The index can be stale if a file was removed behind our back
+                for filename in [name for name in entry['files'] if not os.path.exists(self.path(name))]:
+                    self.bytes -= entry['files'].pop(filename)
+                if not entry['files']:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._mark_accessed(key, entry, now)
+            return list(entry['files'])
+
+    def touch(self, filename):
+        """Mark one file accessed; returns False if it is not stored here
+
+        Files written by another process since the last sweep are picked up.
+        """
+        key = self.entry_key(filename)
+        if key is None:
+            return False
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or filename not in entry['files']:
+                try:
+                    size = os.stat(self.path(filename)).st_size
+                except OSError:
+                    return False
+                self._track(key, filename, size, now)
+                entry = self._entries[key]
+            elif self._expired(entry, now):
+                self._remove(key)
+                self.expirations += 1
+                return False
+            self._mark_accessed(key, entry, now)
+            return True
+
+    def sweep(self):
+        """Sync the index with the directory, expire entries past their TTL and enforce the quotas"""
+        now = time.time()
+        with self._lock:
+            on_disk = {}
+            for entry in os.scandir(self.directory):
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith('.tmp'):
+                    if now - stat.st_mtime > TEMP_FILE_MAX_AGE:
+                        self._delete(entry.name)
+                    continue
+                key = self.entry_key(entry.name)
+                if key is not None:
+                    on_disk[entry.name] = (key, stat.st_size, stat.st_mtime)
+
+            # Forget files that are gone, then add the ones other processes wrote
+            for key, entry in list(self._entries.items()):
+                for filename in [name for name in entry['files'] if name not in on_disk]:
+                    self.bytes -= entry['files'].pop(filename)
+                if not entry['files']:
+                    del self._entries[key]
+            for filename, (key, size, mtime) in sorted(on_disk.items(), key=lambda item: item[1][2]):
+                entry = self._entries.get(key)
+                if entry is None or filename not in entry['files']:
+                    self._track(key, filename, size, mtime)
+            # Sort by last access; mtimes can be newer than our index when other processes read the files
+            for key, entry in self._entries.items():
+                entry['accessed'] = max([entry['accessed']] + [on_disk[name][2] for name in entry['files']])
+            self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1]['accessed']))
+
+            expired = [key for key, entry in self._entries.items() if self._expired(entry, now)]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            evicted = self._enforce_quotas()
+            self.last_sweep = now
+        return len(expired) + evicted
+
+    def _track(self, key, filename, size, accessed):
+        entry = self._entries.setdefault(key, {'files': {}, 'accessed': accessed})
+        self.bytes += size - entry['files'].get(filename, 0)
+        entry['files'][filename] = size
+        entry['accessed'] = max(entry['accessed'], accessed)
+        self._entries.move_to_end(key)
+
+    def _mark_accessed(self, key, entry, now):
+        entry['accessed'] = now
+        self._entries.move_to_end(key)
+        for filename in entry['files']:
+            try:
+                os.utime(self.path(filename), (now, now))
+            except OSError:
+                pass
+
+    def _expired(self, entry, now):
+        return bool(self.ttl) and now - entry['accessed'] > self.ttl
+
+    def _enforce_quotas(self):
+        evicted = 0
+        while self._entries and ((self.max_entries and len(self._entries) > self.max_entries)
+                                 or (self.max_bytes and self.bytes > self.max_bytes)):
+            self._remove(next(iter(self._entries)))
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for filename, size in entry['files'].items():
+            self.bytes -= size
+            self._delete(filename)
+
+    def _delete(self, filename):
+        try:
+            os.remove(self.path(filename))
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'entries': len(self._entries),
+                'files': sum(len(entry['files']) for entry in self._entries.values()),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'last_sweep': self.last_sweep
+            }
+
+
+class StorageSweeper:
+    """Daemon thread calling sweep() on a set of storage managers every `interval` seconds"""
+
+    def __init__(self, managers, interval=300):
+        self.managers = managers
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='storage-sweeper', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for manager in self.managers:
+                try:
+                    manager.sweep()
+                except Exception as e:
+                    print(f"Error sweeping {manager.directory}: {e}")
+
+    def stop(self):
+        self._stop.set()
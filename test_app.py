@@ -1,7 +1,48 @@
 import unittest
 import os
+import io
+import json
 import tempfile
-from app import app, allowed_file, extract_text_from_pdf, calculate_ats_score
+import time
+import threading
+import zipfile
+from unittest import mock
+from reportlab.pdfgen import canvas
+from app import app, allowed_file, extract_text_from_pdf, calculate_ats_score, result_cache, run_upload_job, build_analysis_prompts, generate_resume_html
+from search_index import SkillIndex
+from ranking import CorpusStore
+from job_matching import JobMatcher, tokenize
+from inference import InferenceClient
+from inference_stub import start_stub_server
+from resilience import TokenBucket, CircuitBreaker
+from job_queue import JobQueue
+from extraction import extract_pdf_text
+from cache import DiskCache, LRUCache, SQLiteCache, TieredCache, SingleFlight
+from ats_scoring import ATSScorer, load_rules
+from skill_taxonomy import SkillTaxonomy
+from sections import SectionSegmenter
+from resume_templates import TemplateRegistry, DEFAULT_TEMPLATE_DIR
+from artifacts import ArtifactStore
+from pdf_render import PDFRenderPool
+from storage import StorageManager
+
+def make_pdf(pages):
+    """Build an in-memory PDF with one line of text per page"""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for line in pages:
+        pdf.drawString(72, 720, line)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def parse_sse(body):
+    """Split a Server-Sent Events body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
 
 class ResumeAnalyzerTestCase(unittest.TestCase):
     """Test cases for Resume Analyzer application"""
@@ -16,9 +57,24 @@ class ResumeAnalyzerTestCase(unittest.TestCase):
         self.upload_dir = tempfile.mkdtemp()
         self.generated_dir = tempfile.mkdtemp()
         self.app.config['UPLOAD_FOLDER'] = self.upload_dir
+        result_cache.memory.clear()
+        
+        # Keep the search index out of the working tree
+        self.index_patcher = mock.patch('app.skill_index', SkillIndex(os.path.join(self.generated_dir, 'index.jsonl')))
+        self.index_patcher.start()
+        self.corpus_patcher = mock.patch('app.corpus_store', CorpusStore(os.path.join(self.generated_dir, 'corpus')))
+        self.corpus_patcher.start()
+        self.artifact_patcher = mock.patch('app.artifact_store', ArtifactStore(os.path.join(self.generated_dir, 'artifacts')))
+        self.artifact_patcher.start()
+        self.upload_storage_patcher = mock.patch('app.upload_storage', StorageManager(self.upload_dir))
+        self.upload_storage_patcher.start()
         
     def tearDown(self):
         """Clean up after tests"""
+        self.index_patcher.stop()
+        self.corpus_patcher.stop()
+        self.artifact_patcher.stop()
+        self.upload_storage_patcher.stop()
         # Clean up temporary directories
         import shutil
         shutil.rmtree(self.upload_dir, ignore_errors=True)
@@ -62,6 +118,77 @@ class ResumeAnalyzerTestCase(unittest.TestCase):
         score = calculate_ats_score(poor_resume)
         self.assertLess(score, 30)  # Should have a low score
     
+    def test_ats_breakdown(self):
+        """Test the compiled scorer reports per-rule points that add up to the score"""
+        result = ATSScorer().score('Skilled engineer. EXPERIENCE and education. jo@x.io 555-123-4567')
+        by_rule = {item['rule']: item for item in result['breakdown']}
+        self.assertEqual(by_rule['sections']['matched'], ['experience', 'education'])
+        # 'led' occurs inside 'Skilled', matching the substring semantics of the rules
+        self.assertEqual(by_rule['action_verbs']['matched'], ['led'])
+        self.assertTrue(by_rule['email']['matched'])
+        self.assertEqual(result['score'], sum(item['points'] for item in result['breakdown']))
+    
+    def test_section_segmentation(self):
+        """Test headings split the text into sections with offsets, including inline content after a colon"""
+        text = 'Jo Smith\nPROFESSIONAL SUMMARY\nBackend engineer.\nWork Experience\nLed a team\nSkills: Python, Go\n'
+        segmenter = SectionSegmenter()
+        sections = segmenter.segment(text)
+        self.assertEqual([section['name'] for section in sections], ['summary', 'experience', 'skills'])
+        self.assertEqual(text[sections[0]['start']:sections[1]['start']], 'PROFESSIONAL SUMMARY\nBackend engineer.\n')
+        self.assertEqual(sections[-1]['end'], len(text))
+        self.assertEqual(segmenter.texts(text)['skills'], 'Python, Go')
+        self.assertIs(segmenter.segment(text), sections)  # cached per document
+        
+        prompts = build_analysis_prompts(text)
+        self.assertTrue(prompts['skills'].endswith('Skills: Python, Go'))
+        self.assertNotIn('Backend engineer', prompts['skills'])
+        # Unsegmented text falls back to the start of the resume
+        self.assertTrue(build_analysis_prompts('Python developer')['skills'].endswith('Python developer'))
+        
+        response = self.client.post('/analyze', json={'resume_text': text})
+        self.assertEqual([section['name'] for section in response.get_json()['sections']], ['summary', 'experience', 'skills'])
+    
+    def test_ats_custom_rules(self):
+        """Test keyword groups are configurable, including terms sharing a prefix"""
+        rules = load_rules()
+        rules['keywords'] = {'tools': {'terms': ['java', 'javascript', 'go'], 'points': 3, 'mode': 'each'}}
+        result = ATSScorer(rules).score('Built with JavaScript')
+        self.assertEqual(result['breakdown'][-1]['matched'], ['java', 'javascript'])
+        self.assertEqual(result['score'], 6)
+        
+        # The same rules through the compiled automaton used for large rule sets
+        with mock.patch('ats_scoring.COMPILED_MIN_TERMS', 0):
+            compiled = ATSScorer(rules)
+        self.assertIsNotNone(compiled.keyword_regex)
+        self.assertEqual(compiled.score('Built with JavaScript'), result)
+        self.assertEqual(compiled.score('going, skilled, led'), ATSScorer(rules).score('going, skilled, led'))
+    
+    def test_ats_score_batch_matches_single(self):
+        """Test vectorized batch scoring returns exactly the single-resume scores"""
+        texts = [
+            '',
+            'short',
+            'Skilled engineer with experience',
+            'Summary: led projects. EDUCATION. jo@x.io (555) 123-4567 ' + 'filler ' * 40,
+            'Objective skills education experience summary designed built 555-123-4567'
+        ]
+        scorer = ATSScorer()
+        self.assertEqual(scorer.score_batch(texts), [calculate_ats_score(text) for text in texts])
+    
+    def test_rescore_cli(self):
+        """Test the offline rescore command writes one score per archived resume"""
+        archive = os.path.join(self.upload_dir, 'archive.jsonl')
+        output = os.path.join(self.upload_dir, 'scores.jsonl')
+        with open(archive, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'id': 'a', 'resume_text': 'Experience and education'}) + '\n')
+            f.write(json.dumps({'id': 'b', 'resume_text': 'short'}) + '\n')
+        
+        result = self.app.test_cli_runner().invoke(args=['rescore', archive, output, '--chunk-size', '1'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(output, 'r', encoding='utf-8') as f:
+            scores = [json.loads(line) for line in f]
+        self.assertEqual(scores, [{'id': 'a', 'ats_score': 20}, {'id': 'b', 'ats_score': 0}])
+    
     def test_home_page(self):
         """Test home page loads correctly"""
         response = self.client.get('/')
@@ -95,6 +222,719 @@ class ResumeAnalyzerTestCase(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
     
+    def test_extract_text_from_pdf(self):
+        """Test text extraction from bytes and file objects"""
+        pdf_bytes = make_pdf(['First page', 'Second page'])
+        text = extract_text_from_pdf(pdf_bytes)
+        self.assertIn('First page', text)
+        self.assertIn('Second page', text)
+        self.assertEqual(extract_text_from_pdf(io.BytesIO(pdf_bytes)), text)
+    
+    def test_parallel_extraction_matches_inline(self):
+        """Test page-parallel extraction returns the same text as inline extraction"""
+        pdf_bytes = make_pdf([f'Page number {n}' for n in range(6)])
+        inline = extract_pdf_text(pdf_bytes, workers=0)
+        parallel = extract_pdf_text(pdf_bytes, workers=2, page_timeout=5, doc_timeout=30, min_parallel_pages=2)
+        self.assertEqual(parallel['text'], inline['text'])
+        self.assertEqual(parallel['pages_extracted'], 6)
+        self.assertFalse(parallel['truncated'])
+        
+        # A budget that is never met decodes in growing waves of one range per worker, not one task per page
+        import extraction
+        pool = extraction.get_pool(2)
+        with mock.patch.object(extraction, 'get_pool', return_value=pool), \
+                mock.patch.object(pool, 'submit', wraps=pool.submit) as submit:
+            budgeted = extract_pdf_text(pdf_bytes, workers=2, min_parallel_pages=2, max_chars=10000)
+        self.assertEqual(budgeted['text'], inline['text'])
+        self.assertEqual(submit.call_count, 5)  # the page count, then waves of 2 and 4 pages
+    
+    def test_extraction_deadline_truncates(self):
+        """Test an exhausted document budget returns partial text flagged as truncated"""
+        pdf_bytes = make_pdf(['One', 'Two', 'Three', 'Four'])
+        result = extract_pdf_text(pdf_bytes, workers=2, doc_timeout=1e-9, min_parallel_pages=2)
+        self.assertLess(result['pages_extracted'], 4)
+        self.assertTrue(result['truncated'])
+        
+        # Counting the pages is bounded too, off the calling thread
+        import extraction
+        slow_count = lambda reader: time.sleep(2) or 4
+        with mock.patch('PyPDF2.PdfReader._get_num_pages', slow_count):
+            extraction._discard_pool()
+            self.addCleanup(extraction._discard_pool)
+            for workers in (0, 1):
+                started = time.time()
+                result = extract_pdf_text(pdf_bytes, workers=workers, page_timeout=0.2, doc_timeout=0.5)
+                self.assertLess(time.time() - started, 1)
+                self.assertIsNone(result['page_count'])
+                self.assertTrue(result['truncated'])
+    
+    def test_small_document_page_limits(self):
+        """Test a slow page of a small document is cut off by the page limit, inline and on the pool"""
+        import extraction
+        pdf_bytes = make_pdf(['Only page'])
+        slow_extract = lambda page, *args, **kwargs: time.sleep(2) or 'late'
+        with mock.patch('PyPDF2.PageObject.extract_text', slow_extract):
+            started = time.time()
+            inline = extract_pdf_text(pdf_bytes, workers=0, page_timeout=0.2, doc_timeout=0.5)
+            self.assertLess(time.time() - started, 1)
+            self.assertTrue(inline['truncated'])
+            
+            # New workers are forked with the slow page
+            extraction._discard_pool()
+            self.addCleanup(extraction._discard_pool)
+            started = time.time()
+            pooled = extract_pdf_text(pdf_bytes, workers=1, page_timeout=0.2, doc_timeout=0.5)
+            self.assertLess(time.time() - started, 1)
+            self.assertTrue(pooled['truncated'])
+    
+    def test_budgeted_extraction_stops_early(self):
+        """Test a character budget stops decoding and reports where to resume"""
+        pdf_bytes = make_pdf([f'Page {n} ' + 'x' * 50 for n in range(5)])
+        first = extract_pdf_text(pdf_bytes, max_chars=100)
+        self.assertEqual(first['pages_extracted'], 2)
+        self.assertEqual(first['next_page'], 2)
+        self.assertFalse(first['truncated'])
+        
+        rest = extract_pdf_text(pdf_bytes, start_page=first['next_page'])
+        self.assertIsNone(rest['next_page'])
+        self.assertIn('Page 4', rest['text'])
+        self.assertNotIn('Page 1', rest['text'])
+    
+    def test_upload_full_text_is_lazy(self):
+        """Test pages past the budget are only decoded when the full text is requested"""
+        pdf_bytes = make_pdf([f'Lazy page {n} ' + 'y' * 50 for n in range(3)] + ['Lazy page 3 EDUCATION jo@example.com'])
+        budget = self.app.config['EXTRACTION_CHAR_BUDGET']
+        self.app.config['EXTRACTION_CHAR_BUDGET'] = 60
+        try:
+            import app as app_module
+            with mock.patch('app.add_to_corpus', wraps=app_module.add_to_corpus) as add_to_corpus:
+                response = self.client.post('/upload', data={
+                    'file': (io.BytesIO(pdf_bytes), 'resume.pdf'),
+                    'full_text': 'false'
+                }, content_type='multipart/form-data')
+                app_module.corpus_executor.submit(lambda: None).result()
+            data = response.get_json()
+            self.assertEqual(data['extraction']['next_page'], 1)
+            self.assertNotIn('Lazy page 3', data['resume_text'])
+            # Only the full text is vectorized for ranking, decoded in the background
+            self.assertIn('Lazy page 3', add_to_corpus.call_args[0][2])
+            self.assertIn(data['resume_id'], app_module.corpus_store)
+            
+            response = self.client.post('/upload', data={
+                'file': (io.BytesIO(pdf_bytes), 'resume.pdf')
+            }, content_type='multipart/form-data')
+            data = response.get_json()
+        finally:
+            self.app.config['EXTRACTION_CHAR_BUDGET'] = budget
+        self.assertEqual(data['cache'], 'hit')
+        self.assertIsNone(data['extraction']['next_page'])
+        self.assertEqual(data['extraction']['pages_extracted'], 4)
+        self.assertIn('Lazy page 3', data['resume_text'])
+        # The score covers the pages decoded after the budget
+        self.assertEqual(data['ats_score'], calculate_ats_score(data['resume_text']))
+    
+    def test_upload_is_parsed_in_memory(self):
+        """Test upload does not touch disk unless archiving is enabled"""
+        pdf_bytes = make_pdf(['Jane Doe jane@example.com'])
+        self.app.config['ARCHIVE_UPLOADS'] = False
+        response = self.client.post('/upload', data={
+            'file': (io.BytesIO(pdf_bytes), 'resume.pdf')
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('jane@example.com', response.get_json()['resume_text'])
+        self.assertEqual(os.listdir(self.upload_dir), [])
+        
+        self.app.config['ARCHIVE_UPLOADS'] = True
+        try:
+            response = self.client.post('/upload', data={
+                'file': (io.BytesIO(pdf_bytes), 'resume.pdf')
+            }, content_type='multipart/form-data')
+        finally:
+            self.app.config['ARCHIVE_UPLOADS'] = False
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.listdir(self.upload_dir), ['resume.pdf'])
+    
+    def test_upload_result_cache(self):
+        """Test repeated uploads of the same bytes are served from the cache"""
+        pdf_bytes = make_pdf(['Cached Candidate cached@example.com'])
+        before = self.client.get('/api/cache/status').get_json()['results']
+        statuses = []
+        for _ in range(2):
+            response = self.client.post('/upload', data={
+                'file': (io.BytesIO(pdf_bytes), 'resume.pdf')
+            }, content_type='multipart/form-data')
+            self.assertEqual(response.status_code, 200)
+            statuses.append(response.get_json()['cache'])
+        self.assertEqual(statuses, ['miss', 'hit'])
+        after = self.client.get('/api/cache/status').get_json()['results']
+        self.assertEqual(after['memory_hits'] - before['memory_hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        
+        # Hits on the shared tier are counted apart, with its size
+        tiered = TieredCache(maxsize=4, directory=tempfile.mkdtemp(dir=self.upload_dir))
+        tiered.set('key', {'text': 'x'})
+        tiered.memory.clear()
+        self.assertEqual(tiered.get('key'), {'text': 'x'})
+        stats = tiered.stats()
+        self.assertEqual((stats['memory_hits'], stats['disk_hits']), (0, 1))
+        self.assertGreater(stats['disk']['bytes'], 0)
+    
+    def test_disk_cache_eviction(self):
+        """Test the disk tier evicts least recently used entries above its size limit"""
+        cache_dir = tempfile.mkdtemp(dir=self.upload_dir)
+        cache = DiskCache(cache_dir, max_bytes=250)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, {'text': 'x' * 100})
+            # Keep mtimes distinct so eviction order is deterministic
+            os.utime(os.path.join(cache_dir, f'{key}.json'), (len(os.listdir(cache_dir)),) * 2)
+        cache.evict()
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), {'text': 'x' * 100})
+        
+        # The directory is only scanned when the tracked size goes over the limit
+        large = DiskCache(tempfile.mkdtemp(dir=self.upload_dir), max_bytes=1000)
+        with mock.patch.object(large, 'evict', wraps=large.evict) as evict:
+            for key in ('d', 'e', 'f', 'g', 'd'):
+                large.set(key, {'text': 'x' * 100})
+            self.assertEqual(evict.call_count, 1)  # the first write counts the directory
+            for key in range(8):
+                large.set(f'h{key}', {'text': 'x' * 100})
+        self.assertGreater(evict.call_count, 1)
+        self.assertLessEqual(large._bytes, 1000)
+    
+    def test_batch_upload_streams_ndjson(self):
+        """Test batch upload streams one NDJSON record per file plus a summary"""
+        response = self.client.post('/upload/batch', data={
+            'files': [
+                (io.BytesIO(make_pdf(['Batch One one@example.com'])), 'one.pdf'),
+                (io.BytesIO(make_pdf(['Batch Two two@example.com'])), 'two.pdf'),
+                (io.BytesIO(b'not a pdf'), 'notes.txt')
+            ]
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        
+        records = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual(records[-1], {'done': True, 'total': 3, 'succeeded': 2})
+        by_name = {record['filename']: record for record in records[:-1]}
+        self.assertIn('one@example.com', by_name['one.pdf']['resume_text'])
+        self.assertIn('ats_score', by_name['two.pdf'])
+        self.assertEqual(by_name['notes.txt']['error'], 'Invalid file type')
+    
+    def test_skill_index_queries(self):
+        """Test boolean, prefix and phrase queries against the skill index"""
+        path = os.path.join(self.generated_dir, 'skills.jsonl')
+        index = SkillIndex(path)
+        index.add('r1', 'a.pdf', ['Kubernetes', 'Go', 'Machine Learning'])
+        index.add('r2', 'b.pdf', ['Kubernetes', 'Python', 'missing:Go'])
+        index.add('r3', 'c.pdf', ['Go', 'Python'])
+        
+        self.assertEqual(index.search('kubernetes AND go'), (1, ['r1']))
+        self.assertEqual(index.search('kube* go'), (1, ['r1']))
+        self.assertEqual(index.search('go OR python'), (3, ['r1', 'r2', 'r3']))
+        self.assertEqual(index.search('python NOT kubernetes'), (1, ['r3']))
+        self.assertEqual(index.search('"machine learning"'), (1, ['r1']))
+        self.assertEqual(index.search('missing:go'), (1, ['r2']))
+        self.assertEqual(index.search('py*', limit=1), (2, ['r2']))
+        
+        # Re-indexing replaces old terms, and the log rebuilds the same index
+        index.add('r3', 'c.pdf', ['Rust'])
+        self.assertEqual(index.search('python'), (1, ['r2']))
+        self.assertEqual(SkillIndex(path).search('rust OR go'), (2, ['r1', 'r3']))
+    
+    def test_search_endpoint(self):
+        """Test uploads are indexed and searchable through /search"""
+        response = self.client.post('/upload', data={
+            'file': (io.BytesIO(make_pdf(['Indexed Candidate: Python, Flask and PostgreSQL'])), 'indexed.pdf')
+        }, content_type='multipart/form-data')
+        resume_id = response.get_json()['resume_id']
+        self.client.post('/upload', data={
+            'file': (io.BytesIO(make_pdf(['Other Candidate: Java and Spring'])), 'other.pdf')
+        }, content_type='multipart/form-data')
+        
+        response = self.client.get('/search?q=python AND flask')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['results'], [{'resume_id': resume_id, 'filename': 'indexed.pdf'}])
+        # Terms come from the text, not from the demo analysis shared by every resume
+        self.assertEqual(self.client.get('/search?q=java').get_json()['results'][0]['filename'], 'other.pdf')
+        self.assertEqual(self.client.get('/search?q=machine learning').get_json()['total'], 0)
+        
+        self.assertEqual(self.client.get('/search?q=python OR').status_code, 400)
+        self.assertEqual(self.client.get('/search').status_code, 400)
+    
+    def test_job_matcher(self):
+        """Test TF-IDF job matching reports coverage and missing terms"""
+        matcher = JobMatcher()
+        self.assertEqual(tokenize('C++, Node.js and CI/CD.'), ['c++', 'node.js', 'and', 'ci/cd'])
+        
+        resume = 'Backend engineer: Python/Django, Docker, Kubernetes and machine learning.'
+        match = matcher.match(resume, job_description='Python, Kubernetes, Go and AWS')
+        self.assertEqual(match['matched_terms'], ['Kubernetes', 'Python'])
+        self.assertEqual(sorted(match['missing_terms']), ['AWS', 'Go'])
+        self.assertGreater(match['match_percentage'], 0)
+        self.assertLess(match['match_percentage'], 100)
+        
+        self.assertEqual(matcher.match(resume, job_description='Python Kubernetes')['match_percentage'], 100.0)
+        self.assertEqual(matcher.match('Gardening', job_description='Python')['match_percentage'], 0.0)
+        # Bare job titles expand to the profile's usual requirements
+        self.assertIn('Docker', matcher.match(resume, target_job='DevOps Engineer')['matched_terms'])
+    
+    def test_analyze_job_comparison(self):
+        """Test /analyze computes a real match instead of a fixed percentage"""
+        response = self.client.post('/analyze', json={
+            'resume_text': 'Python developer with Docker and AWS experience',
+            'job_description': 'Python AWS Terraform'
+        })
+        self.assertEqual(response.status_code, 200)
+        comparison = response.get_json()['analysis']['job_comparison']
+        self.assertEqual(comparison['matched_skills'], ['AWS', 'Python'])
+        self.assertEqual(comparison['missing_skills'], ['Terraform'])
+        self.assertLess(comparison['match_percentage'], 100)
+    
+    def test_match_uses_full_text(self):
+        """Test /match compares only the job, on the whole PDF even after a budgeted upload"""
+        pdf_bytes = make_pdf([f'Match page {n} ' + 'z' * 50 for n in range(3)] + ['Terraform and Kubernetes'])
+        budget = self.app.config['EXTRACTION_CHAR_BUDGET']
+        self.app.config['EXTRACTION_CHAR_BUDGET'] = 60
+        try:
+            uploaded = self.client.post('/upload', data={
+                'file': (io.BytesIO(pdf_bytes), 'resume.pdf'),
+                'full_text': 'false'
+            }, content_type='multipart/form-data').get_json()
+            with mock.patch('app.iter_analysis_sections') as analysis:
+                partial = self.client.post('/match', json={
+                    'resume_text': uploaded['resume_text'], 'job_description': 'Terraform'
+                }).get_json()
+                full = self.client.post('/match', data={
+                    'file': (io.BytesIO(pdf_bytes), 'resume.pdf'), 'job_description': 'Terraform'
+                }, content_type='multipart/form-data').get_json()
+        finally:
+            self.app.config['EXTRACTION_CHAR_BUDGET'] = budget
+        self.assertFalse(analysis.called)
+        self.assertEqual(partial['missing_skills'], ['Terraform'])
+        self.assertEqual(full['matched_skills'], ['Terraform'])
+        self.assertEqual(full['match_percentage'], 100.0)
+        # The completed text is cached for the next request
+        self.assertIsNone(result_cache.get(uploaded['resume_id'])['extraction']['next_page'])
+        self.assertEqual(self.client.post('/match', json={}).status_code, 400)
+    
+    def test_corpus_store_top_k(self):
+        """Test ranking pages, persistence and skipping of duplicates"""
+        directory = os.path.join(self.generated_dir, 'ranking')
+        store = CorpusStore(directory)
+        store.add('a', 'a.pdf', {0: 0.6, 2: 0.8})
+        store.add('b', 'b.pdf', {1: 1.0})
+        store.add('empty', 'empty.pdf', {})
+        store.add('c', 'c.pdf', {0: 1.0})
+        self.assertFalse(store.add('a', 'a.pdf', {1: 1.0}))
+        
+        job = {0: 0.5, 2: 0.5}
+        total, first = store.top_k(job, 3, k=1, page=1)
+        self.assertEqual(total, 2)
+        self.assertEqual([r['resume_id'] for r in first], ['a'])
+        self.assertAlmostEqual(first[0]['score'], 0.7, places=4)
+        _, second = store.top_k(job, 3, k=1, page=2)
+        self.assertEqual([r['resume_id'] for r in second], ['c'])
+        
+        # A second store (another worker) reads the same corpus
+        reopened = CorpusStore(directory)
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual([r['resume_id'] for r in reopened.top_k({1: 1.0}, 3)[1]], ['b'])
+    
+    def test_rank_endpoint(self):
+        """Test ranking uploaded resumes against a job description"""
+        resumes = {
+            'python.pdf': 'Python developer with Django, Docker and AWS experience',
+            'java.pdf': 'Java developer with Spring and Kubernetes experience'
+        }
+        for filename, text in resumes.items():
+            data = {'file': (io.BytesIO(make_pdf([text])), filename)}
+            self.client.post('/upload', data=data, content_type='multipart/form-data')
+        
+        response = self.client.post('/rank', json={'job_description': 'Python Django AWS engineer', 'k': 5})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['results'][0]['filename'], 'python.pdf')
+        self.assertFalse(data['has_more'])
+        
+        self.assertEqual(self.client.post('/rank', json={}).status_code, 400)
+        self.assertEqual(self.client.post('/rank', json={'target_job': 'Data Scientist', 'k': 0}).status_code, 400)
+    
+    def test_inference_client_runs_prompts_concurrently(self):
+        """Test that prompts share the wall clock and that slow calls time out"""
+        server, base_url = start_stub_server(delay=0.3)
+        self.addCleanup(server.shutdown)
+        client = InferenceClient(api_base=base_url, timeout=5, max_concurrency=5)
+        self.addCleanup(client.close)
+        
+        prompts = {name: f"{name} prompt" for name in ('highlights', 'rating', 'suggestions', 'summary', 'skills')}
+        started = time.time()
+        responses = client.query_many(prompts)
+        self.assertLess(time.time() - started, 1.0)
+        self.assertEqual(responses['summary'][0]['generated_text'], 'stub response to: summary prompt')
+        
+        impatient = InferenceClient(api_base=base_url, timeout=0.1)
+        self.addCleanup(impatient.close)
+        self.assertIsNone(impatient.query('slow'))
+    
+    def test_prompt_cache_ttl_and_sqlite_tier(self):
+        """Test TTL expiry and the shared SQLite tier"""
+        memory = LRUCache(maxsize=4, ttl=0.05)
+        memory.set('key', {'value': 1})
+        self.assertEqual(memory.get('key'), {'value': 1})
+        time.sleep(0.06)
+        self.assertIsNone(memory.get('key'))
+        
+        path = os.path.join(self.generated_dir, 'prompts.db')
+        shared = SQLiteCache(path, max_entries=2)
+        for index in range(3):
+            shared.set(f'k{index}', [index])
+            time.sleep(0.01)
+        shared.evict()
+        self.assertEqual(len(shared), 2)
+        self.assertIsNone(shared.get('k0'))
+        # Another worker's cache sees the same entries
+        self.assertEqual(SQLiteCache(path).get('k2'), [2])
+    
+    def test_inference_client_caches_responses(self):
+        """Test that identical prompts are answered from the cache"""
+        server, base_url = start_stub_server()
+        self.addCleanup(server.shutdown)
+        client = InferenceClient(api_base=base_url, timeout=5, cache=TieredCache(maxsize=16))
+        self.addCleanup(client.close)
+        
+        first = client.query('same prompt')
+        self.assertEqual(client.query('same prompt'), first)
+        client.query('same prompt', parameters={'temperature': 0.1})
+        self.assertEqual(server.requests_seen, 2)
+        self.assertEqual(client.stats()['cache']['hits'], 1)
+    
+    def test_single_flight_coalesces_identical_requests(self):
+        """Test that concurrent identical prompts reach the backend once"""
+        server, base_url = start_stub_server(delay=0.2)
+        self.addCleanup(server.shutdown)
+        client = InferenceClient(api_base=base_url, timeout=5, single_flight=SingleFlight())
+        self.addCleanup(client.close)
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.query('popular resume'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(server.requests_seen, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(client.stats()['single_flight']['coalesced'], 4)
+        
+        # Two workers sharing a cache coordinate through the lock directory
+        lock_dir = os.path.join(self.generated_dir, 'locks')
+        shared = SQLiteCache(os.path.join(self.generated_dir, 'shared.db'))
+        workers = [
+            InferenceClient(api_base=base_url, timeout=5, cache=TieredCache(disk=shared), single_flight=SingleFlight(lock_dir))
+            for _ in range(2)
+        ]
+        threads = [threading.Thread(target=worker.query, args=('shared prompt',)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(server.requests_seen, 2)
+
+        # ...also when their prompts go through the micro-batcher
+        server.requests_seen = 0
+        workers = [
+            InferenceClient(api_base=base_url, timeout=5, max_batch_size=8, max_batch_wait_ms=20,
+                            cache=TieredCache(disk=shared), single_flight=SingleFlight(lock_dir))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            self.addCleanup(worker.close)
+        results = []
+        threads = [
+            threading.Thread(target=lambda worker=worker: results.append(worker.query_many({'summary': 'batched shared prompt'})))
+            for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(server.requests_seen, 1)
+        self.assertTrue(all(result['summary'] for result in results))
+
+        # Lock files are a fixed set of stripes, not one per key
+        stripe_dir = os.path.join(self.generated_dir, 'stripes')
+        striped = SingleFlight(stripe_dir, lock_stripes=4)
+        for n in range(20):
+            striped.do(f'key {n}', lambda: n)
+        self.assertLessEqual(len(os.listdir(stripe_dir)), 4)
+    
+    def test_micro_batching_groups_concurrent_prompts(self):
+        """Test that prompts of concurrent analyses go out as list inputs, one prompt per analysis per batch"""
+        server, base_url = start_stub_server()
+        self.addCleanup(server.shutdown)
+        prompts = {name: f"{name} prompt" for name in ('highlights', 'rating', 'suggestions', 'summary', 'skills')}
+        
+        # A lone analysis does not wait on its own prompts
+        client = InferenceClient(api_base=base_url, timeout=5, max_batch_size=8, max_batch_wait_ms=50)
+        self.addCleanup(client.close)
+        responses = client.query_many(prompts)
+        self.assertEqual(server.requests_seen, 5)
+        self.assertEqual(server.batch_sizes, [])
+        self.assertEqual(responses['rating'], [{'generated_text': 'stub response to: rating prompt'}])
+        
+        # Eight analyses at once fill batches of eight without a thread per prompt
+        server.requests_seen = 0
+        client = InferenceClient(api_base=base_url, timeout=5, max_batch_size=8, max_batch_wait_ms=2000)
+        self.addCleanup(client.close)
+        results = []
+        threads = [
+            threading.Thread(target=lambda n=n: results.append(client.query_many({k: f"{v} {n}" for k, v in prompts.items()})))
+            for n in range(8)
+        ]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.time() - started, 1)
+        self.assertEqual(server.batch_sizes, [8] * 5)
+        self.assertEqual(server.requests_seen, 5)
+        self.assertTrue(all(response for result in results for response in result.values()))
+        self.assertEqual(client.stats()['batching']['average_batch_size'], 8.0)
+    
+    def test_token_bucket_and_circuit_breaker(self):
+        """Test rate back-off on 429 and the breaker's open/half-open/closed cycle"""
+        bucket = TokenBucket(rate=100, capacity=1)
+        self.assertTrue(bucket.acquire(timeout=0))
+        bucket.penalize(retry_after=0.2)
+        self.assertEqual(bucket.state()['rate'], 50)
+        self.assertFalse(bucket.acquire(timeout=0.05))
+        self.assertTrue(bucket.acquire(timeout=0.5))
+        bucket.reward()
+        self.assertEqual(bucket.state()['rate'], 50.5)
+        
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one probe while half-open
+        breaker.record_success()
+        self.assertEqual(breaker.state()['status'], 'closed')
+    
+    def test_analyze_falls_back_when_backend_fails(self):
+        """Test that an unhealthy backend trips the breaker and analysis uses the local fallback"""
+        server, base_url = start_stub_server()
+        self.addCleanup(server.shutdown)
+        server.fail_status = 503
+        client = InferenceClient(api_base=base_url, timeout=5, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        self.addCleanup(client.close)
+        
+        self.assertIsNone(client.query('first'))
+        self.assertIsNone(client.query('second'))
+        self.assertIsNone(client.query('third'))
+        self.assertEqual(server.requests_seen, 2)
+        
+        with mock.patch('app.inference_client', client), mock.patch.dict(app.config, {'AI_ANALYSIS_ENABLED': True}):
+            response = self.client.post('/analyze', json={'resume_text': 'Experienced Python developer. Built Docker tooling.'})
+            status = self.client.get('/api/inference/status').get_json()
+        analysis = response.get_json()['analysis']
+        self.assertEqual(analysis['source'], 'fallback')
+        self.assertIn('Python', analysis['highlights']['skills'])
+        self.assertEqual(status['circuit_breaker']['status'], 'open')
+        self.assertFalse(status['available'])
+        
+        # A 200 whose body is not JSON is a failed prompt, not a server error
+        server.fail_status = None
+        server.invalid_body = True
+        garbled = InferenceClient(api_base=base_url, timeout=5)
+        self.addCleanup(garbled.close)
+        self.assertIsNone(garbled.query('garbled'))
+        with mock.patch('app.inference_client', garbled), mock.patch.dict(app.config, {'AI_ANALYSIS_ENABLED': True}):
+            response = self.client.post('/analyze', json={'resume_text': 'Python developer'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['analysis']['source'], 'fallback')
+    
+    def test_analyze_uses_inference_when_enabled(self):
+        """Test that AI output is merged into the analysis"""
+        server, base_url = start_stub_server()
+        self.addCleanup(server.shutdown)
+        client = InferenceClient(api_base=base_url, timeout=5)
+        self.addCleanup(client.close)
+        
+        with mock.patch('app.inference_client', client), mock.patch.dict(app.config, {'AI_ANALYSIS_ENABLED': True}):
+            response = self.client.post('/analyze', json={'resume_text': 'Python developer'})
+        analysis = response.get_json()['analysis']
+        self.assertEqual(set(analysis['ai_output']), {'highlights', 'rating', 'suggestions', 'summary', 'skills'})
+        self.assertTrue(analysis['summary'].startswith('stub response to: Generate a 2-line'))
+    
+    def test_upload_job_mode(self):
+        """Test that job mode returns a job ID at once and the result can be polled"""
+        queue = JobQueue(os.path.join(self.generated_dir, 'jobs.db'), workers=1, poll_interval=0.05)
+        queue.register('upload', run_upload_job)
+        self.addCleanup(queue.stop)
+        self.app.config['JOB_STORAGE_DIR'] = os.path.join(self.generated_dir, 'jobs')
+        
+        pdf = make_pdf(['Queued resume with email test@example.com'])
+        with mock.patch('app.job_queue', queue):
+            response = self.client.post('/upload', data={'file': (io.BytesIO(pdf), 'queued.pdf'), 'async': 'true'},
+                                        content_type='multipart/form-data')
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()['job_id']
+            
+            deadline = time.time() + 10
+            while time.time() < deadline:
+                job = self.client.get(f'/jobs/{job_id}').get_json()
+                if job['status'] in ('done', 'failed'):
+                    break
+                time.sleep(0.05)
+            self.assertEqual(self.client.get('/jobs/unknown').status_code, 404)
+        
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['result']['filename'], 'queued.pdf')
+        self.assertIn('Queued resume', job['result']['resume_text'])
+        self.assertEqual(os.listdir(self.app.config['JOB_STORAGE_DIR']), [])
+    
+    def test_job_queue_recovers_stale_jobs(self):
+        """Test that jobs left running by a dead worker are requeued and rerun"""
+        queue = JobQueue(os.path.join(self.generated_dir, 'jobs.db'), stale_after=0)
+        queue.register('echo', lambda payload: {'echo': payload['value']})
+        queue._connection().execute(
+            "INSERT INTO jobs (id, kind, payload, status, attempts, created, started) VALUES ('stale', 'echo', ?, 'running', 1, 0, 0)",
+            (json.dumps({'value': 1}),)
+        )
+        queue.recover()
+        self.assertEqual(queue.get('stale')['status'], 'queued')
+        self.assertTrue(queue.run_one())
+        job = queue.get('stale')
+        self.assertEqual((job['status'], job['result'], job['attempts']), ('done', {'echo': 1}, 2))
+        self.assertFalse(queue.run_one())
+        
+        # A reopened database resumes its queued jobs without a new enqueue
+        path = os.path.join(self.generated_dir, 'restart.db')
+        JobQueue(path)._connection().execute(
+            "INSERT INTO jobs (id, kind, payload, status, created) VALUES ('waiting', 'echo', ?, 'queued', 0)",
+            (json.dumps({'value': 2}),)
+        )
+        reopened = JobQueue(path, workers=1, poll_interval=0.05)
+        reopened.register('echo', lambda payload: {'echo': payload['value']})
+        self.addCleanup(reopened.stop)
+        self.assertTrue(reopened.resume())
+        deadline = time.time() + 5
+        while reopened.get('waiting')['status'] != 'done' and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(reopened.get('waiting')['result'], {'echo': 2})
+        self.assertFalse(JobQueue(os.path.join(self.generated_dir, 'empty.db')).resume())
+        
+        # Errors other than SQLite's do not end a worker thread
+        flaky = JobQueue(os.path.join(self.generated_dir, 'flaky.db'), workers=1, poll_interval=0.05)
+        flaky.register('echo', lambda payload: {'echo': payload['value']})
+        self.addCleanup(flaky.stop)
+        claim = flaky._claim
+        failures = [OSError('database directory unavailable')]
+        
+        def flaky_claim():
+            if failures:
+                raise failures.pop()
+            return claim()
+        
+        with mock.patch.object(flaky, '_claim', side_effect=flaky_claim):
+            job_id = flaky.enqueue('echo', {'value': 3})
+            deadline = time.time() + 5
+            while flaky.get(job_id)['status'] != 'done' and time.time() < deadline:
+                time.sleep(0.05)
+        self.assertEqual(failures, [])
+        self.assertEqual(flaky.get(job_id)['result'], {'echo': 3})
+    
+    def test_upload_streams_events(self):
+        """Test that a streaming upload sends extraction, ATS and each section before the full result"""
+        pdf = make_pdf(['Streaming resume with email stream@example.com'])
+        response = self.client.post('/upload', data={'file': (io.BytesIO(pdf), 'stream.pdf'), 'stream': 'true'},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = parse_sse(response.get_data(as_text=True))
+        names = [event for event, _ in events]
+        self.assertEqual(names[:2], ['extraction', 'ats'])
+        self.assertEqual(names[2:7], ['section'] * 5)
+        self.assertEqual(names[-1], 'done')
+        sections = {data['key']: data['value'] for event, data in events if event == 'section'}
+        done = events[-1][1]
+        self.assertEqual(sections['summary'], done['analysis']['summary'])
+        self.assertEqual(events[1][1]['ats_score'], done['ats_score'])
+        self.assertEqual(done['filename'], 'stream.pdf')
+    
+    def test_analyze_streams_events(self):
+        """Test that a streaming analysis sends the ATS score and job comparison first"""
+        response = self.client.post('/analyze', json={
+            'resume_text': 'Python developer with Docker experience',
+            'job_description': 'Python Kubernetes',
+            'stream': True
+        })
+        events = parse_sse(response.get_data(as_text=True))
+        self.assertEqual([event for event, _ in events[:2]], ['ats', 'job_comparison'])
+        self.assertEqual(events[1][1]['missing_skills'], ['Kubernetes'])
+        self.assertEqual(events[-1][0], 'done')
+        self.assertEqual(events[-1][1]['analysis']['job_comparison'], events[1][1])
+    
+    def test_skill_taxonomy_matches_longest_alias(self):
+        """Test that the taxonomy trie prefers the longest name and resolves aliases and compounds"""
+        path = os.path.join(self.generated_dir, 'taxonomy.json')
+        with open(path, 'w') as f:
+            json.dump({'skills': {
+                'Machine Learning': {'category': 'data_ml', 'aliases': ['ml']},
+                'Kubernetes': {'category': 'cloud_devops', 'aliases': ['k8s']},
+                'Django': {'category': 'framework'},
+                'Python': {'category': 'language'},
+                'Learning': {'category': 'soft_skill'}
+            }}, f)
+        taxonomy = SkillTaxonomy(path)
+        
+        result = taxonomy.extract('Machine learning on K8s with Python/Django, more machine learning and ML')
+        self.assertEqual(result['skills'], ['Machine Learning', 'Django', 'Kubernetes', 'Python'])
+        self.assertEqual(result['categories']['cloud_devops'], ['Kubernetes'])
+        self.assertEqual(taxonomy.extract('continuous learning')['skills'], ['Learning'])
+    
+    def test_analysis_backends(self):
+        """Test that the local backend needs no inference and hybrid only sends the LLM-only prompts"""
+        server, base_url = start_stub_server()
+        self.addCleanup(server.shutdown)
+        client = InferenceClient(api_base=base_url, timeout=5)
+        self.addCleanup(client.close)
+        resume_text = 'Python developer running Django services on k8s and AWS.'
+        
+        with mock.patch('app.inference_client', client), mock.patch.dict(app.config, {'ANALYSIS_BACKEND': 'local'}):
+            analysis = self.client.post('/analyze', json={'resume_text': resume_text}).get_json()['analysis']
+        self.assertEqual(analysis['source'], 'local')
+        self.assertIn('Kubernetes', analysis['highlights']['skills'])
+        self.assertNotIn('AWS', analysis['missing_skills'])
+        self.assertEqual(server.requests_seen, 0)
+
+        # Missing skills follow the requested job, most important to it first
+        with mock.patch.dict(app.config, {'ANALYSIS_BACKEND': 'local'}):
+            missing = {
+                job: self.client.post('/analyze', json={'resume_text': resume_text, 'target_job': job}).get_json()['analysis']['missing_skills']
+                for job in ('Data Scientist', 'DevOps Engineer')
+            }
+            described = self.client.post('/analyze', json={
+                'resume_text': resume_text,
+                'job_description': 'Ansible and Terraform. Terraform modules, Terraform state.'
+            }).get_json()['analysis']['missing_skills']
+        self.assertNotEqual(missing['Data Scientist'], missing['DevOps Engineer'])
+        self.assertIn('Deep Learning', missing['Data Scientist'])
+        self.assertEqual(described, ['Terraform', 'Ansible'])
+
+        with mock.patch('app.inference_client', client), mock.patch.dict(app.config, {'ANALYSIS_BACKEND': 'hybrid'}):
+            analysis = self.client.post('/analyze', json={'resume_text': resume_text}).get_json()['analysis']
+        self.assertEqual(analysis['source'], 'hybrid')
+        self.assertEqual(set(analysis['ai_output']), {'rating', 'suggestions', 'summary'})
+        self.assertIn('Kubernetes', analysis['highlights']['skills'])
+    
     def test_analyze_without_data(self):
         """Test analyze endpoint without data"""
         response = self.client.post('/analyze', json={})
@@ -109,6 +949,201 @@ class ResumeAnalyzerTestCase(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
     
+    def test_resume_templates(self):
+        """Test resume templates are autoescaped, listed from the config, and picked up from new files"""
+        html = generate_resume_html('classic', {'name': '<script>x</script>', 'experience': 'One\nTwo', 'skills': ['C++']})
+        self.assertIn('&lt;script&gt;x&lt;/script&gt;', html)
+        self.assertIn('One<br>Two', html)
+        self.assertIn('Professional Experience', html)
+        self.assertIn('Minimal', self.client.get('/api/templates').get_json()[3]['name'])
+        
+        directory = tempfile.mkdtemp()
+        for filename in ('base.html', 'modern.html'):
+            with open(os.path.join(DEFAULT_TEMPLATE_DIR, filename)) as source, open(os.path.join(directory, filename), 'w') as target:
+                target.write(source.read())
+        with open(os.path.join(directory, 'compact_two.html'), 'w') as f:
+            f.write('{% extends "base.html" %}{% block summary_title %}Profile{% endblock %}')
+        registry = TemplateRegistry({'modern': {'name': 'Modern'}}, directory=directory, default='modern')
+        self.assertEqual([item['id'] for item in registry.metadata()], ['modern', 'compact_two'])
+        self.assertIn('Profile', registry.render('compact_two', {'name': 'Jo'}))
+        self.assertIn('Professional Summary', registry.render('unknown', {}))
+        self.assertEqual(set(registry.benchmark(iterations=2)), {'modern', 'compact_two'})
+    
+    def test_generate_reuses_artifacts(self):
+        """Test that repeated /generate calls return the same content-addressed files without rebuilding"""
+        import app as app_module
+        payload = {'template_id': 'modern', 'resume_data': {'name': 'Jo', 'skills': ['Python']}}
+        with mock.patch('app.generate_pdf_with_reportlab', wraps=app_module.generate_pdf_with_reportlab) as build_pdf:
+            first = self.client.post('/generate', json=payload).get_json()
+            second = self.client.post('/generate', json=payload).get_json()
+            other = self.client.post('/generate', json=dict(payload, template_id='classic')).get_json()
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(first['html_url'], second['html_url'])
+        self.assertEqual(first['pdf_url'], second['pdf_url'])
+        self.assertNotEqual(first['html_url'], other['html_url'])
+        self.assertEqual(build_pdf.call_count, 2)
+        self.assertEqual(self.client.get(first['pdf_url']).status_code, 200)
+        
+        # The index is rebuilt from disk and bounded; evicted keys lose their files
+        store = ArtifactStore(app_module.artifact_store.directory, max_entries=1)
+        self.assertEqual(store.stats()['entries'], 1)
+        self.assertEqual(len([name for name in os.listdir(store.directory) if not name.startswith('.')]), 2)
+    
+    def test_generate_direct_output(self):
+        """Test direct mode streams the file without writing to disk unless persist is set"""
+        import app as app_module
+        directory = app_module.artifact_store.directory
+        payload = {'template_id': 'minimal', 'resume_data': {'name': 'Direct <Jo>', 'experience': 'Line one\nLine two'}, 'output': 'pdf'}
+        
+        response = self.client.post('/generate', json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertTrue(response.data.startswith(b'%PDF'))
+        self.assertEqual(os.listdir(directory), [])
+        
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.post('/generate', json=payload, headers={'If-None-Match': etag}).status_code, 304)
+        
+        html = self.client.post('/generate', json=dict(payload, output='html', persist=True))
+        self.assertEqual(html.mimetype, 'text/html')
+        self.assertIn(b'Direct &lt;Jo&gt;', html.data)
+        self.assertEqual(len(os.listdir(directory)), 2)
+        self.assertEqual(self.client.post('/generate', json=payload).headers['X-Artifact-Cache'], 'hit')
+    
+    def test_generate_bulk_zip(self):
+        """Test bulk generation streams a ZIP with every job's files and a manifest"""
+        jobs = [
+            {'template_id': 'modern', 'resume_data': {'name': 'Ann Lee', 'skills': ['Python']}},
+            {'template_id': 'classic', 'resume_data': {'name': 'Bo <Kim>', 'experience': 'Line one\nLine two'}},
+            {'template_id': 'minimal', 'resume_data': {'name': 'Cy'}}
+        ]
+        with mock.patch.dict(app.config, {'BULK_WORKERS': 2}):
+            response = self.client.post('/generate/bulk', json={'jobs': jobs, 'formats': ['html', 'pdf']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/zip')
+        
+        with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+            names = archive.namelist()
+            manifest = json.loads(archive.read('manifest.json'))
+            self.assertIn(b'Bo &lt;Kim&gt;', archive.read('0002_Bo_Kim_classic.html'))
+            self.assertTrue(archive.read('0001_Ann_Lee_modern.pdf').startswith(b'%PDF'))
+        self.assertEqual(len(names), 7)
+        self.assertEqual(names[-1], 'manifest.json')
+        self.assertEqual((manifest['total'], manifest['succeeded']), (3, 3))
+        self.assertEqual(manifest['jobs'][2]['files'], ['0003_Cy_minimal.html', '0003_Cy_minimal.pdf'])
+        
+        self.assertEqual(self.client.post('/generate/bulk', json={'jobs': [{'template_id': 'modern'}]}).status_code, 400)
+        self.assertEqual(self.client.post('/generate/bulk', json={'jobs': jobs, 'formats': ['docx']}).status_code, 400)
+    
+    def test_storage_quotas(self):
+        """Test storage evicts least recently used entries over quota, expires old ones and syncs with the directory"""
+        directory = os.path.join(self.generated_dir, 'managed')
+        storage = StorageManager(directory, max_bytes=25, entry_key=lambda name: name.split('.')[0])
+        for name in ('a.html', 'a.pdf', 'b.html'):
+            with open(storage.path(name), 'wb') as f:
+                f.write(b'x' * 10)
+            storage.add(name)
+        # a.html and a.pdf are one entry, evicted together
+        self.assertEqual(os.listdir(directory), ['b.html'])
+        self.assertEqual(storage.stats()['bytes'], 10)
+        
+        # Files written by other processes are picked up; abandoned temporary files are removed
+        for name in ('c.html', '.c.html.1234.tmp'):
+            with open(storage.path(name), 'wb') as f:
+                f.write(b'x' * 10)
+        os.utime(storage.path('.c.html.1234.tmp'), (0, 0))
+        self.assertTrue(storage.touch('b.html'))
+        storage.sweep()
+        self.assertEqual(sorted(os.listdir(directory)), ['b.html', 'c.html'])
+        self.assertEqual(storage.get('c'), ['c.html'])
+        
+        now = time.time()
+        with mock.patch('storage.time.time', return_value=now + 100):
+            self.assertTrue(storage.touch('c.html'))
+        storage.ttl = 60
+        with mock.patch('storage.time.time', return_value=now + 120):
+            storage.sweep()
+        self.assertEqual(os.listdir(directory), ['c.html'])
+        self.assertEqual(storage.stats()['expirations'], 1)
+        
+        # Downloads go through the artifact store and unknown names are refused
+        import app as app_module
+        response = self.client.post('/generate', json={'template_id': 'modern', 'resume_data': {'name': 'Stored'}})
+        html_url = response.get_json()['html_url']
+        self.assertEqual(self.client.get(html_url).status_code, 200)
+        self.assertEqual(self.client.get('/download/index.jsonl').status_code, 404)
+        status = self.client.get('/api/storage/status').get_json()
+        self.assertEqual(status['generated']['entries'], 1)
+        self.assertEqual(status['generated']['directory'], app_module.artifact_store.directory)
+    
+    def test_pdf_render_pool(self):
+        """Test PDFs render on worker processes with timings, and a full queue makes /generate return 503"""
+        pool = PDFRenderPool(workers=1, max_queue=2)
+        self.addCleanup(pool.close)
+        pdf_path = os.path.join(self.generated_dir, 'pooled.pdf')
+        self.assertTrue(pool.render({'name': 'Jo', 'experience': 'Led <b>things</b>\nBuilt more'}, pdf_path))
+        with open(pdf_path, 'rb') as f:
+            self.assertEqual(f.read(4), b'%PDF')
+        stats = pool.stats()
+        self.assertEqual((stats['rendered'], stats['queue_depth']), (1, 0))
+        self.assertGreater(stats['last']['render_ms'], 0)
+        
+        # A render that times out keeps its queue slot until the worker is done with it
+        impatient = PDFRenderPool(workers=1, max_queue=1, timeout=0.001)
+        self.addCleanup(impatient.close)
+        self.assertIsNone(impatient.render_bytes({'name': 'Slow', 'summary': 'words ' * 2000}))
+        self.assertEqual(impatient.stats()['queue_depth'], 1)
+        deadline = time.time() + 10
+        while impatient.stats()['queue_depth'] and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(impatient.stats()['queue_depth'], 0)
+
+        # Without working multiprocessing the pool renders inline for good
+        with mock.patch('pdf_render.ProcessPoolExecutor', side_effect=OSError(38, 'Function not implemented')):
+            inline = PDFRenderPool(workers=2)
+            inline.warm()
+            self.assertEqual(inline.render_bytes({'name': 'Inline'})[:4], b'%PDF')
+        self.assertEqual(inline.stats()['workers'], 0)
+
+        # A broken pool is dropped and replaced on the next render
+        from concurrent.futures.process import BrokenProcessPool
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool('worker died')
+        pools = [broken, mock.Mock(wraps=pool._get_pool())]
+        with mock.patch('pdf_render.ProcessPoolExecutor', side_effect=pools):
+            recovering = PDFRenderPool(workers=1)
+            self.assertEqual(recovering.render_bytes({'name': 'Broken'})[:4], b'%PDF')
+            self.assertEqual(recovering.render_bytes({'name': 'Recovered'})[:4], b'%PDF')
+        self.assertTrue(pools[1].submit.called)
+        self.assertEqual(recovering.stats()['workers'], 1)
+
+        full = PDFRenderPool(workers=0, max_queue=1)
+        full.depth = 1  # one PDF already in flight
+        with mock.patch('app.pdf_renderer', full):
+            response = self.client.post('/generate', json={'template_id': 'modern', 'resume_data': {'name': 'Queued'}})
+            status = self.client.get('/api/render/status').get_json()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(status['rejected'], 1)
+    
+    def test_generate_errors_without_reportlab(self):
+        """Test /generate still answers JSON errors when ReportLab cannot be imported"""
+        import subprocess
+        import sys
+        script = (
+            "import sys; sys.modules['pdf_render'] = None\n"
+            "from unittest import mock\n"
+            "import app\n"
+            "with mock.patch('app.artifact_flight.do', side_effect=RuntimeError('boom')):\n"
+            "    response = app.app.test_client().post('/generate', json={'template_id': 'modern', 'resume_data': {'name': 'Jo'}})\n"
+            "print(response.status_code, response.get_json()['error'])\n"
+        )
+        env = dict(os.environ, PDF_RENDER_WARM='false')
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=60).stdout
+        self.assertIn('500 PDF generation failed: boom', output)
+    
     def test_compare_scores(self):
         """Test score comparison functionality"""
         response = self.client.post('/compare', json={